@@ -0,0 +1,262 @@
+# fake_services.py
+# Local stand-ins for every external service the pipeline talks to, served
+# from one stdlib ThreadingHTTPServer so benchmarks run offline and
+# deterministically:
+#   /api/chat        scripted Ollama chat (streaming NDJSON or single JSON)
+#   /api/embed       deterministic Ollama embeddings
+#   /api/v1/search   Algolia-shaped Hacker News search
+#   /vtt/<id>.vtt    canned YouTube rolling auto-captions
+#   /site/<name>/... static multi-page company website
+
+import re
+import json
+import math
+import time
+import zlib
+import random
+import hashlib
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+WORDS = (
+    "organic natural moisturizing balm shea butter beeswax vitamin lips skin care brand customers review "
+    "quality price shipping sustainable packaging vegan cruelty free formula scent flavor texture long lasting "
+    "hydration protection winter dry cracked recommend favorite daily routine ingredients certified retail"
+).split()
+SYNTHESIS_MARKER = "Collected tool data per company:"
+
+
+@dataclass
+class FakeConfig:
+    token_delay: float = 0.0      # seconds per streamed token
+    reply_tokens: int = 120       # words in a scripted summary reply
+    embed_dim: int = 64
+    site_pages: int = 8
+    page_words: int = 400
+    hn_hits: int = 250            # hits per query across all pages
+    vtt_cues: int = 300
+
+
+def _words(seed: str, count: int) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(WORDS) for _ in range(count)]
+
+
+# ----------------------------
+# Response builders
+# ----------------------------
+def chat_reply(messages: List[Dict], config: FakeConfig) -> str:
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    if SYNTHESIS_MARKER not in prompt:
+        return " ".join(_words(prompt[-200:], config.reply_tokens)).capitalize() + "."
+
+    # Synthesis call: echo back every company the prompt carried, as PiggyBank JSON
+    block = prompt.split(SYNTHESIS_MARKER, 1)[1].split("\n\nReturn", 1)[0]
+    try:
+        collected = json.loads(block)
+    except json.JSONDecodeError:
+        collected = []
+    companies = [
+        {
+            "name": c["name"],
+            "website": c["website"],
+            "info": {
+                "text_content": c.get("website_summary", ""),
+                "links": [],
+                "hn_articles": [],
+                "video_summary": c.get("youtube_summary", ""),
+            },
+        }
+        for c in collected
+    ]
+    return "```json\n" + json.dumps({"companies": companies}, indent=2) + "\n```"
+
+
+def embedding(text: str, dim: int) -> List[float]:
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+
+def hn_page(query: str, page: int, hits_per_page: int, config: FakeConfig) -> Dict:
+    now = int(time.time())
+    start = page * hits_per_page
+    hits = []
+    for i in range(start, min(start + hits_per_page, config.hn_hits)):
+        title = f"Show HN: {query} ships feature {i}" if i % 3 == 0 else f"Ask HN: {' '.join(_words(f'{query}{i}', 6))}"
+        created = now - i * 3600
+        hits.append({
+            "objectID": f"{zlib.crc32(query.encode('utf-8'))}-{i}",
+            "title": title,
+            "author": f"user{i % 17}",
+            "url": f"https://example.com/{i}" if i % 4 else None,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(created)),
+            "created_at_i": created,
+            "num_comments": i % 50,
+        })
+    return {"hits": hits, "page": page, "nbPages": math.ceil(config.hn_hits / hits_per_page), "hitsPerPage": hits_per_page}
+
+
+def rolling_vtt(video_id: str, config: FakeConfig) -> str:
+    def stamp(seconds: float) -> str:
+        return time.strftime("%H:%M:%S", time.gmtime(seconds)) + f".{int(seconds * 1000) % 1000:03d}"
+
+    lines = [" ".join(_words(f"{video_id}{i}", 8)) for i in range(config.vtt_cues)]
+    out = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    for i in range(1, len(lines)):
+        t = i * 2.0
+        out += [f"{stamp(t)} --> {stamp(t + 2.0)} align:start position:0%", lines[i - 1], lines[i], ""]
+        out += [f"{stamp(t + 2.0)} --> {stamp(t + 2.01)} align:start position:0%", lines[i], ""]
+    return "\n".join(out)
+
+
+def site_page(name: str, page: int, base: str, config: FakeConfig) -> str:
+    nav = "".join(f'<li><a href="{base}/site/{name}/p{i}">Page {i}</a></li>' for i in range(config.site_pages))
+    paragraphs = "".join(
+        f"<p>{' '.join(_words(f'{name}{page}{j}', config.page_words // 4))}.</p>" for j in range(4)
+    )
+    return (
+        f"<html><head><title>{name} page {page}</title><style>p{{margin:0}}</style></head><body>"
+        f"<nav><ul>{nav}</ul></nav><h1>{name}</h1>{paragraphs}"
+        f'<footer><a href="https://twitter.com/{name}">Twitter</a><a href="/site/{name}/p0#top">Top</a></footer>'
+        "</body></html>"
+    )
+
+
+# ----------------------------
+# HTTP handler
+# ----------------------------
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: FakeConfig = FakeConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, payload: Dict, status: int = 200) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/api/chat":
+            return self._chat(self._read_json())
+        if path == "/api/embed":
+            payload = self._read_json()
+            inputs = payload.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            return self._json({"model": payload.get("model"), "embeddings": [embedding(t, self.config.embed_dim) for t in inputs]})
+        self._json({"error": "not found"}, 404)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if path == "/api/v1/search":
+            query = parse_qs(parsed.query)
+            q = query.get("query", [""])[0]
+            page = int(query.get("page", ["0"])[0])
+            hits_per_page = int(query.get("hitsPerPage", ["20"])[0])
+            return self._json(hn_page(q, page, hits_per_page, self.config))
+
+        match = re.fullmatch(r"/vtt/([\w-]+)\.vtt", path)
+        if match:
+            return self._send(200, rolling_vtt(match.group(1), self.config).encode("utf-8"), "text/vtt")
+
+        match = re.fullmatch(r"/site/([\w-]+)(?:/p(\d+))?/?", path)
+        if match:
+            page = int(match.group(2) or 0)
+            if page >= self.config.site_pages:
+                return self._send(404, b"<html><body>Not found</body></html>", "text/html")
+            base = f"http://{self.headers.get('Host')}"
+            return self._send(200, site_page(match.group(1), page, base, self.config).encode("utf-8"), "text/html; charset=utf-8")
+
+        self._send(404, b"not found", "text/plain")
+
+    def _chat(self, payload: Dict) -> None:
+        content = chat_reply(payload.get("messages", []), self.config)
+        tokens = re.findall(r"\S+\s*", content) or [content]
+        stats = {
+            "done": True,
+            "total_duration": int(len(tokens) * self.config.token_delay * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": sum(len(str(m.get("content", ""))) for m in payload.get("messages", [])) // 4,
+            "prompt_eval_duration": 0,
+            "eval_count": len(tokens),
+            "eval_duration": int(len(tokens) * self.config.token_delay * 1e9),
+        }
+        model = payload.get("model", "fake")
+
+        if not payload.get("stream", True):
+            time.sleep(len(tokens) * self.config.token_delay)
+            return self._json({"model": model, "message": {"role": "assistant", "content": content}, **stats})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            if self.config.token_delay:
+                time.sleep(self.config.token_delay)
+            line = {"model": model, "message": {"role": "assistant", "content": token}, "done": False}
+            self._chunk(json.dumps(line).encode("utf-8") + b"\n")
+        final = {"model": model, "message": {"role": "assistant", "content": ""}, **stats}
+        self._chunk(json.dumps(final).encode("utf-8") + b"\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeServices:
+    """Runs the fake server on a background thread; use as a context manager."""
+
+    def __init__(self, config: Optional[FakeConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        handler = type("ConfiguredHandler", (FakeServiceHandler,), {"config": config or FakeConfig()})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def site_url(self, name: str) -> str:
+        return f"{self.url}/site/{name}/"
+
+    def vtt_url(self, video_id: str) -> str:
+        return f"{self.url}/vtt/{video_id}.vtt"
+
+    def __enter__(self) -> "FakeServices":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the fake Ollama / HN / YouTube / website endpoints.")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    with FakeServices(FakeConfig(token_delay=args.token_delay), port=args.port) as services:
+        print(f"🧪 Fake services on {services.url}")
+        threading.Event().wait()
@@ -0,0 +1,260 @@
+# run_benchmarks.py
+# Offline throughput/latency benchmarks for the scraping and synthesis
+# pipeline. Every external service is replaced by fake_services.py, caches
+# are bypassed so each iteration does real work, and results are printed
+# (and optionally written) as JSON so runs can be diffed across changes.
+#
+#   python benchmarks/run_benchmarks.py --iterations 20 --output bench.json
+#   python benchmarks/run_benchmarks.py --baseline bench.json --token-delay 0.002
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+from typing import Awaitable, Callable, Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "supervisor"))
+
+from fake_services import FakeConfig, FakeServices
+
+ALL_BENCHMARKS = ("crawl_website", "hn_scrape_logic", "transcript_summarize", "analyze_chat_and_scrape", "end_to_end")
+CHAT_SESSION = {
+    "session_uuid": "bench-session",
+    "messages": [
+        {"role": "assistant", "question": "What is your product and what does it do?", "answer": ""},
+        {"role": "user", "question": "", "answer": "An organic lip balm with shea butter for dry, cracked lips"},
+        {"role": "assistant", "question": "Who are your target customers?", "answer": ""},
+        {"role": "user", "question": "", "answer": "Eco-conscious shoppers who want vegan, cruelty free skin care"},
+    ],
+}
+
+
+# ----------------------------
+# Measurement helpers
+# ----------------------------
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure(name: str, run: Callable[[int], Awaitable], iterations: int, concurrency: int) -> Dict:
+    """Runs `run(i)` for i in range(iterations), at most `concurrency` at a time."""
+    latencies: List[float] = []
+    errors: List[str] = []
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(i: int) -> None:
+        async with slots:
+            start = time.perf_counter()
+            try:
+                await run(i)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    wall = time.perf_counter() - wall
+
+    result = {
+        "name": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": len(errors),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(latencies) / wall, 3) if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if errors:
+        result["first_error"] = errors[0]
+    print(f"⏱️ {name}: p50 {result['p50_ms']}ms p95 {result['p95_ms']}ms, {result['throughput_per_s']}/s, "
+          f"{result['errors']} errors", file=sys.stderr)
+    return result
+
+
+def compare(results: List[Dict], baseline_path: str) -> None:
+    """Adds ratio-to-baseline fields (>1.0 means slower / lower throughput than baseline)."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    for result in results:
+        before = baseline.get(result["name"])
+        if not before:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if before[key]:
+                result[f"{key}_vs_baseline"] = round(result[key] / before[key], 3)
+        if result["throughput_per_s"]:
+            result["throughput_vs_baseline"] = round(before["throughput_per_s"] / result["throughput_per_s"], 3)
+
+
+# ----------------------------
+# Benchmarks
+# ----------------------------
+class Bench:
+    def __init__(self, services: FakeServices, workdir: str, companies: int, pages: int):
+        self.services = services
+        self.workdir = workdir
+        self.pages = pages
+        self.company_data = [{
+            "companies": [{"name": f"Brand{i:03d}", "website": services.site_url(f"brand{i:03d}")} for i in range(companies)]
+        }]
+
+    # Imported lazily so the environment set in main() is in place first
+    async def crawl_website(self, i: int) -> None:
+        from data_pull_tools.website_scraper_tool import CompanyWebsiteScraper
+        pages = await CompanyWebsiteScraper(fetch_mode="http").crawl_website(self.services.site_url(f"crawl{i}"), self.pages)
+        assert pages, "crawl returned no pages"
+
+    async def hn_scrape_logic(self, i: int) -> None:
+        from data_pull_tools.hacker_news_tool import HNScrapeInput, hn_scrape_logic
+        # A new name per iteration keeps the in-memory query cache out of the measurement
+        await hn_scrape_logic(HNScrapeInput(company=f"Brand{i:03d}"))
+
+    def prepare_transcripts(self, product: str, videos: int = 3) -> str:
+        import httpx
+        from data_pull_tools.youtube_scraper_tool import VideoProcessor
+        directory = os.path.join(self.workdir, f"{product}_review_captions")
+        os.makedirs(directory, exist_ok=True)
+        for v in range(videos):
+            vtt = httpx.get(self.services.vtt_url(f"{product}-{v}")).text
+            with open(os.path.join(directory, f"video{v}.json"), "w", encoding="utf-8") as f:
+                json.dump({"video_title": f"video{v}", "video_url": "", "transcript": VideoProcessor.dedupe_vtt(vtt)}, f)
+        return directory
+
+    async def transcript_summarize(self, i: int) -> None:
+        from data_pull_tools.youtube_scraper_tool import TranscriptSummarizer
+        directory = await asyncio.to_thread(self.prepare_transcripts, f"product{i}")
+        await TranscriptSummarizer(directory, f"product{i}").summarize()
+
+    # Canned tool results: isolates prefilter, orchestration and streamed synthesis
+    @staticmethod
+    def canned_tools() -> Dict:
+        async def website(company: Dict) -> Dict:
+            return {"text_content": f"{company['name']} makes organic lip balm.", "links": [company["website"]]}
+
+        async def hacker_news(company: Dict) -> Dict:
+            return {"hn_articles": []}
+
+        async def youtube(company: Dict) -> Dict:
+            return {"video_summary": f"Reviewers like {company['name']}."}
+
+        return {"website": website, "hacker_news": hacker_news, "youtube": youtube}
+
+    # Real website (HTTP mode) and HN tools, YouTube fed from the fake VTT endpoint
+    def live_tools(self) -> Dict:
+        from orchestrator import run_hn_tool
+        from data_pull_tools.website_scraper_tool import ScraperInput, scrape_website_logic
+        from data_pull_tools.youtube_scraper_tool import TranscriptSummarizer
+
+        async def website(company: Dict) -> Dict:
+            output = await scrape_website_logic(ScraperInput(url=company["website"], max_pages=self.pages, fetch_mode="http"))
+            return {"text_content": output.summary_text, "links": [str(link) for link in output.links]}
+
+        async def youtube(company: Dict) -> Dict:
+            directory = await asyncio.to_thread(self.prepare_transcripts, company["name"].lower())
+            result = await TranscriptSummarizer(directory, company["name"]).summarize()
+            return {"video_summary": result.get("summary", "")}
+
+        return {"website": website, "hacker_news": run_hn_tool, "youtube": youtube}
+
+    async def _analyze(self, tools: Dict) -> None:
+        from utils import analyze_chat_and_scrape
+        from orchestrator import ToolOrchestrator
+        piggy_bank = await analyze_chat_and_scrape(
+            [CHAT_SESSION], self.company_data, orchestrator=ToolOrchestrator(tools=tools), sink_path=None
+        )
+        assert piggy_bank.companies, "no companies synthesized"
+
+    async def analyze_chat_and_scrape(self, i: int) -> None:
+        await self._analyze(self.canned_tools())
+
+    async def end_to_end(self, i: int) -> None:
+        await self._analyze(self.live_tools())
+
+
+async def run_all(args, services: FakeServices, workdir: str) -> List[Dict]:
+    bench = Bench(services, workdir, companies=args.companies, pages=args.pages)
+    selected = args.only or ALL_BENCHMARKS
+    results = []
+    for name in ALL_BENCHMARKS:
+        if name not in selected:
+            continue
+        heavy = name == "end_to_end"
+        iterations = max(1, args.iterations // 5) if heavy else args.iterations
+        concurrency = 1 if heavy else args.concurrency
+        results.append(await measure(name, getattr(bench, name), iterations, concurrency))
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks against local fake services.")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--companies", type=int, default=20, help="companies offered to the prefilter")
+    parser.add_argument("--pages", type=int, default=5, help="max pages crawled per site")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="fake Ollama seconds per streamed token")
+    parser.add_argument("--only", nargs="+", choices=ALL_BENCHMARKS)
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="supervisor-bench-")
+    with FakeServices(FakeConfig(token_delay=args.token_delay)) as services:
+        # Point every client at the fakes and keep persistent caches out of the numbers
+        os.environ["OLLAMA_HOST"] = services.url
+        os.environ["HN_SEARCH_URL"] = f"{services.url}/api/v1/search"
+        os.environ["COMPANY_INDEX_DIR"] = os.path.join(workdir, "company_index")
+        os.environ.setdefault("LLM_CACHE_BYPASS", "1")
+        os.environ.setdefault("PAGE_CACHE_DISABLED", "1")
+        os.environ.setdefault("CRAWL_POLITENESS_DELAY", "0")
+        os.environ.setdefault("CRAWL_PER_DOMAIN_CONCURRENCY", "8")
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            results = asyncio.run(run_all(args, services, workdir))
+        finally:
+            os.chdir(cwd)
+
+    if args.baseline:
+        compare(results, args.baseline)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# startup_time.py
+# Cold-import benchmark. Each sample runs in a fresh interpreter so nothing
+# is cached in sys.modules; the time of the import statement itself and the
+# number of modules it loaded are reported as JSON. --compare-ref measures a
+# second tree extracted from a git ref (e.g. the commit before the lazy
+# registry) with the same statements.
+#
+#   python benchmarks/startup_time.py --runs 15 --compare-ref HEAD~1
+
+import os
+import sys
+import json
+import shutil
+import tarfile
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import Dict, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# name -> (working directory relative to the tree root, statement, statement for trees without the registry)
+TARGETS = {
+    "import data_pull_tools": ("", "import data_pull_tools", None),
+    "import supervisor utils": ("supervisor", "import utils", None),
+    "first tool lookup": (
+        "",
+        "from data_pull_tools import get_tool; get_tool('hn_scrape_tool')",
+        "from data_pull_tools import hn_scrape_tool",
+    ),
+}
+
+SNIPPET = """
+import sys, time, json
+before = len(sys.modules)
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": len(sys.modules) - before}}))
+"""
+
+
+def sample(tree: str, cwd: str, statement: str) -> Dict:
+    env = dict(os.environ, PYTHONPATH=tree, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(statement=statement)],
+        cwd=os.path.join(tree, cwd), env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure_tree(tree: str, runs: int, legacy: bool = False) -> Dict[str, Dict]:
+    results = {}
+    for name, (cwd, statement, legacy_statement) in TARGETS.items():
+        if legacy and legacy_statement:
+            statement = legacy_statement
+        # One warm-up run so .pyc compilation is not counted
+        sample(tree, cwd, statement)
+        samples = [sample(tree, cwd, statement) for _ in range(runs)]
+        errors = [s["error"] for s in samples if "error" in s]
+        if errors:
+            results[name] = {"error": errors[0]}
+            continue
+        times = [s["seconds"] * 1000 for s in samples]
+        results[name] = {
+            "median_ms": round(statistics.median(times), 2),
+            "min_ms": round(min(times), 2),
+            "max_ms": round(max(times), 2),
+            "modules_loaded": samples[0]["modules"],
+        }
+        print(f"⏱️ {name}: {results[name]['median_ms']}ms, {results[name]['modules_loaded']} modules", file=sys.stderr)
+    return results
+
+
+def extract_ref(ref: str) -> str:
+    target = tempfile.mkdtemp(prefix="startup-ref-")
+    archive = os.path.join(target, "tree.tar")
+    with open(archive, "wb") as f:
+        subprocess.run(["git", "archive", ref], cwd=ROOT, stdout=f, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(target)
+    os.remove(archive)
+    return target
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the pipeline packages.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--compare-ref", help="git ref to measure as a baseline")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    report: Dict = {"python": sys.version.split()[0], "runs": args.runs, "current": measure_tree(ROOT, args.runs)}
+
+    if args.compare_ref:
+        tree: Optional[str] = extract_ref(args.compare_ref)
+        try:
+            report["baseline_ref"] = args.compare_ref
+            report["baseline"] = measure_tree(tree, args.runs, legacy=True)
+        finally:
+            shutil.rmtree(tree, ignore_errors=True)
+        speedups: Dict[str, float] = {}
+        for name, current in report["current"].items():
+            before = report["baseline"].get(name, {})
+            if "median_ms" in current and "median_ms" in before and current["median_ms"]:
+                speedups[name] = round(before["median_ms"] / current["median_ms"], 2)
+        report["speedup"] = speedups
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,22 @@
-from .website_scraper_tool import scrape_company_website
-from .youtube_scraper_tool import generate_product_summary
+# Tools are resolved lazily through the registry so importing the package
+# does not pull in Selenium, yt_dlp or rapidfuzz.
+from .registry import TOOLS, get_tool, get_tools, tool_names, load_env, close_clients
 
-# 🧼 Patch around HN tool to avoid db_utils import error
-try:
-    from .hacker_news_tool import hn_scrape_tool
-except ImportError:
-    print("⚠️ Skipping hn_scrape_tool import due to db_utils dependency")
-    hn_scrape_tool = None
+__all__ = ["get_tool", "get_tools", "tool_names", "load_env", "close_clients", *TOOLS]
 
-__all__ = ["scrape_company_website", "generate_product_summary", "hn_scrape_tool"]
+
+def __getattr__(name):
+    if name in TOOLS:
+        if name == "hn_scrape_tool":
+            # 🧼 Patch around HN tool to avoid breaking callers when its dependencies are missing
+            try:
+                return get_tool(name)
+            except ImportError:
+                print("⚠️ Skipping hn_scrape_tool import due to missing dependency")
+                return None
+        return get_tool(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(TOOLS))
@@ -0,0 +1,239 @@
+# crawler.py
+# Asyncio crawl engine used by CompanyWebsiteScraper.crawl_website.
+# A process-wide limiter caps the number of in-flight page fetches, both
+# globally and per domain, and spaces requests to the same site politely.
+# The frontier is a priority queue: sitemap URLs and discovered links are
+# ranked by frontier.score_url and filtered by robots.txt before fetching.
+
+import os
+import time
+import heapq
+import asyncio
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, urlunparse, urljoin, parse_qsl, urlencode
+
+from .frontier import SiteHints, is_crawlable, score_url
+
+GLOBAL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+PER_DOMAIN_CONCURRENCY = int(os.getenv("CRAWL_PER_DOMAIN_CONCURRENCY", "2"))
+POLITENESS_DELAY = float(os.getenv("CRAWL_POLITENESS_DELAY", "0.5"))
+MAX_TRACKED_DOMAINS = int(os.getenv("CRAWL_MAX_TRACKED_DOMAINS", "1024"))
+
+MIN_URL_SCORE = -9  # login, cart and account pages are never worth a fetch
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid")
+
+
+# ----------------------------
+# URL helpers
+# ----------------------------
+def canonical_host(hostname: str) -> str:
+    hostname = hostname.lower()
+    return hostname[4:] if hostname.startswith("www.") else hostname
+
+
+def site_key(url: str) -> str:
+    return canonical_host(urlparse(url).hostname or "")
+
+
+def normalize_url(url: str, base_url: Optional[str] = None, strip_www: bool = False) -> Optional[str]:
+    """Canonical form of an HTTP(S) URL; returns None for non-HTTP links.
+
+    strip_www folds www.example.com into example.com the same way site_key does. Use it
+    for dedupe and cache keys, not for the URL that is actually fetched.
+    """
+    if base_url:
+        url = urljoin(base_url, url)
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return None
+
+    netloc = canonical_host(parsed.hostname) if strip_www else parsed.hostname.lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{parsed.port}"
+
+    path = parsed.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    query = urlencode([
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ])
+    return urlunparse((scheme, netloc, path, "", query, ""))
+
+
+def url_key(url: str) -> str:
+    """Dedupe key: www and non-www copies of a page share one key."""
+    return normalize_url(url, strip_www=True) or url
+
+
+# ----------------------------
+# Concurrency limits
+# ----------------------------
+class DomainThrottle:
+    def __init__(self, concurrency: int, delay: float):
+        self.delay = delay
+        self.slots = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._next_allowed = 0.0
+        self.active = 0  # requests holding or waiting for a slot
+
+    def idle(self) -> bool:
+        """Nobody is using it and its politeness delay has passed, so dropping it changes nothing."""
+        return self.active == 0 and time.monotonic() >= self._next_allowed
+
+    async def wait_turn(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if now < self._next_allowed:
+                await asyncio.sleep(self._next_allowed - now)
+            self._next_allowed = time.monotonic() + self.delay
+
+
+class CrawlLimiter:
+    """Global and per-domain fetch limits.
+
+    Domain throttles are kept in LRU order and capped at `max_domains`, so a long-lived
+    server that crawls many sites does not keep one throttle per domain forever. Only idle
+    throttles are evicted; busy ones stay even if that briefly exceeds the cap.
+    """
+
+    def __init__(self, concurrency: int = GLOBAL_CONCURRENCY,
+                 per_domain_concurrency: int = PER_DOMAIN_CONCURRENCY,
+                 politeness_delay: float = POLITENESS_DELAY,
+                 max_domains: int = MAX_TRACKED_DOMAINS):
+        self.per_domain_concurrency = max(1, per_domain_concurrency)
+        self.politeness_delay = politeness_delay
+        self.max_domains = max(1, max_domains)
+        self._global = asyncio.Semaphore(max(1, concurrency))
+        self._domains: "OrderedDict[str, DomainThrottle]" = OrderedDict()
+
+    def _throttle(self, domain: str) -> DomainThrottle:
+        throttle = self._domains.get(domain)
+        if throttle is None:
+            throttle = self._domains[domain] = DomainThrottle(self.per_domain_concurrency, self.politeness_delay)
+            self._evict_idle(keep=domain)
+        else:
+            self._domains.move_to_end(domain)
+        return throttle
+
+    def _evict_idle(self, keep: str) -> None:
+        excess = len(self._domains) - self.max_domains
+        if excess <= 0:
+            return
+        for domain in [d for d, t in self._domains.items() if d != keep and t.idle()][:excess]:
+            del self._domains[domain]
+
+    @asynccontextmanager
+    async def slot(self, domain: str):
+        throttle = self._throttle(domain)
+        throttle.active += 1
+        try:
+            async with throttle.slots:
+                # Sleep out the politeness delay before taking a global slot, so waiting domains don't block other sites
+                await throttle.wait_turn()
+                async with self._global:
+                    yield
+        finally:
+            throttle.active -= 1
+
+
+# asyncio primitives are bound to the loop that first uses them
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CrawlLimiter]" = weakref.WeakKeyDictionary()
+
+
+def get_crawl_limiter() -> CrawlLimiter:
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = _limiters[loop] = CrawlLimiter()
+    return limiter
+
+
+# ----------------------------
+# Crawl engine
+# ----------------------------
+class AsyncCrawler:
+    def __init__(self, fetch: Callable[[str], Awaitable], max_pages: int = 5,
+                 limiter: Optional[CrawlLimiter] = None,
+                 discover: Optional[Callable[[str], Awaitable[SiteHints]]] = None):
+        self.fetch = fetch
+        self.max_pages = max_pages
+        self.limiter = limiter
+        self.discover = discover
+
+    async def crawl(self, base_url: str) -> List:
+        limiter = self.limiter or get_crawl_limiter()
+        start_url = normalize_url(base_url) or base_url
+        base_domain = site_key(start_url)
+        hints = SiteHints()
+        if self.discover:
+            try:
+                hints = await self.discover(start_url)
+            except Exception as e:
+                print(f"⚠️ Sitemap/robots discovery failed for {start_url}: {e}")
+
+        seen = {url_key(start_url)}
+        frontier: List[Tuple[float, int, str]] = [(-score_url(start_url), 0, start_url)]
+        results: List[Tuple[Tuple[float, int], object]] = []
+        order = 1
+
+        def enqueue(link: str, page_url: str) -> None:
+            nonlocal order
+            candidate = normalize_url(link, page_url)
+            if not candidate or site_key(candidate) != base_domain:
+                return
+            key = url_key(candidate)
+            if key in seen:
+                return
+            seen.add(key)
+            score = score_url(candidate)
+            if score < MIN_URL_SCORE or not is_crawlable(candidate) or not hints.allowed(candidate):
+                return
+            heapq.heappush(frontier, (-score, order, candidate))
+            order += 1
+
+        for link in hints.urls:
+            enqueue(link, start_url)
+
+        async def fetch(url: str):
+            async with limiter.slot(base_domain):
+                return await self.fetch(url)
+
+        # The budget counts successful pages; in-flight fetches reserve a slot, and a failed
+        # fetch frees it so the next frontier URL is tried instead of being dropped.
+        concurrency = max(1, min(self.max_pages, limiter.per_domain_concurrency))
+        in_flight: Dict[asyncio.Task, Tuple[float, int, str]] = {}
+        try:
+            while True:
+                while frontier and len(in_flight) < concurrency and len(results) + len(in_flight) < self.max_pages:
+                    item = heapq.heappop(frontier)
+                    in_flight[asyncio.create_task(fetch(item[2]))] = item
+                if not in_flight:
+                    break
+                finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    priority, index, url = in_flight.pop(task)
+                    try:
+                        content = task.result()
+                    except Exception as e:
+                        print(f"❌ Error scraping {url}: {e}")
+                        continue
+                    print(f"🌐 Scraped ({getattr(content, 'fetched_via', 'browser')}): {url}")
+                    results.append(((priority, index), content))
+                    for link in content.links:
+                        if link:
+                            enqueue(link, url)
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+        results.sort(key=lambda item: item[0])
+        return [content for _, content in results]
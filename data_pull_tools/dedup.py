@@ -0,0 +1,141 @@
+# dedup.py
+# Boilerplate and near-duplicate removal for crawled pages. Each text block
+# gets a 64-bit SimHash over word shingles; blocks whose fingerprint is
+# within a small Hamming distance of one already kept (on this page or an
+# earlier page of the same site) are dropped. Lookups use banded buckets so
+# each block is compared only with candidates sharing an 8-bit band.
+
+import re
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .summarizer import estimate_tokens
+
+SIMHASH_BITS = 64
+SHINGLE_WORDS = 3
+NEAR_DUPLICATE_DISTANCE = 6
+BANDS = 8  # distance <= BANDS - 1 guarantees at least one identical band
+BAND_BITS = SIMHASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+WORD = re.compile(r"\w+")
+
+
+class DedupStats(BaseModel):
+    pages: int = 0
+    blocks_in: int = 0
+    blocks_out: int = 0
+    cross_page_dropped: int = 0
+    in_page_dropped: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(words: List[str], shingle_words: int = SHINGLE_WORDS) -> int:
+    if len(words) <= shingle_words:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_words]) for i in range(len(words) - shingle_words + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = _hash64(shingle)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """Fingerprints bucketed by band; near() only checks candidates that share a band."""
+
+    def __init__(self, max_distance: int = NEAR_DUPLICATE_DISTANCE):
+        self.max_distance = max_distance
+        self._bands: List[Dict[int, List[Tuple[int, int]]]] = [{} for _ in range(BANDS)]
+
+    def add(self, fingerprint: int, owner: int) -> None:
+        for band in range(BANDS):
+            key = (fingerprint >> (band * BAND_BITS)) & BAND_MASK
+            self._bands[band].setdefault(key, []).append((fingerprint, owner))
+
+    def near(self, fingerprint: int) -> Optional[int]:
+        """Returns the owner of a stored fingerprint within max_distance, if any."""
+        for band in range(BANDS):
+            key = (fingerprint >> (band * BAND_BITS)) & BAND_MASK
+            for candidate, owner in self._bands[band].get(key, ()):
+                if hamming(candidate, fingerprint) <= self.max_distance:
+                    return owner
+        return None
+
+
+def dedupe_pages(pages: List[List[str]], shingle_words: int = SHINGLE_WORDS,
+                 max_distance: int = NEAR_DUPLICATE_DISTANCE) -> Tuple[List[List[str]], DedupStats]:
+    """Keeps the first occurrence of every block across the site's pages.
+
+    Blocks shorter than a shingle (nav items, button labels) are matched exactly after
+    normalization; longer blocks are matched by SimHash distance.
+    """
+    stats = DedupStats(pages=len(pages))
+    index = SimHashIndex(max_distance)
+    seen_exact: Dict[str, int] = {}
+    kept_pages: List[List[str]] = []
+
+    for page_no, blocks in enumerate(pages):
+        kept: List[str] = []
+        for block in blocks:
+            text = block.strip()
+            if not text:
+                continue
+            stats.blocks_in += 1
+            stats.bytes_in += len(text.encode("utf-8"))
+            stats.tokens_in += estimate_tokens(text)
+
+            words = WORD.findall(text.lower())
+            normalized = " ".join(words)
+            owner = seen_exact.get(normalized)
+            fingerprint = None
+            if owner is None and len(words) >= shingle_words:
+                fingerprint = simhash(words, shingle_words)
+                owner = index.near(fingerprint)
+
+            if owner is not None:
+                if owner == page_no:
+                    stats.in_page_dropped += 1
+                else:
+                    stats.cross_page_dropped += 1
+                continue
+
+            seen_exact[normalized] = page_no
+            if fingerprint is not None:
+                index.add(fingerprint, page_no)
+            kept.append(text)
+            stats.blocks_out += 1
+            stats.bytes_out += len(text.encode("utf-8"))
+            stats.tokens_out += estimate_tokens(text)
+        kept_pages.append(kept)
+
+    return kept_pages, stats
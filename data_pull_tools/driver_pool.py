@@ -0,0 +1,171 @@
+# driver_pool.py
+# Shared pool of long-lived headless Chrome drivers. Both the data_pull_tools
+# website scraper and supervisor/access.py lease drivers from here instead of
+# starting a fresh browser per page.
+
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from . import tracing
+
+# Selenium is imported when the first driver starts, not when the pool module loads
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+DEFAULT_POOL_SIZE = int(os.getenv("CHROME_POOL_SIZE", "2"))
+DEFAULT_MAX_PAGES_PER_DRIVER = int(os.getenv("CHROME_MAX_PAGES_PER_DRIVER", "50"))
+PAGE_LOAD_TIMEOUT = 30
+
+
+def build_chrome_options() -> "Options":
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--log-level=3")
+    return options
+
+
+@lru_cache(maxsize=1)
+def resolve_driver_path() -> Optional[str]:
+    """Resolves the chromedriver binary once per process."""
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager().install()
+    except Exception as e:
+        # Fall back to Selenium Manager's own lookup
+        print(f"⚠️ webdriver_manager unavailable, using Selenium Manager: {e}")
+        return None
+
+
+class ChromeDriverPool:
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE, max_pages_per_driver: int = DEFAULT_MAX_PAGES_PER_DRIVER):
+        self.max_size = max(1, max_size)
+        self.max_pages_per_driver = max(1, max_pages_per_driver)
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._idle: List["webdriver.Chrome"] = []
+        self._page_counts: Dict[int, int] = {}
+        self._closed = False
+
+    def _create_driver(self) -> "webdriver.Chrome":
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        with tracing.span("chrome.start"):
+            driver_path = resolve_driver_path()
+            service = Service(driver_path) if driver_path else Service()
+            driver = webdriver.Chrome(service=service, options=build_chrome_options())
+            driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        tracing.inc("chrome_drivers_started_total")
+        self._page_counts[id(driver)] = 0
+        return driver
+
+    @staticmethod
+    def _is_alive(driver: "webdriver.Chrome") -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver: "webdriver.Chrome") -> None:
+        self._page_counts.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _checkout(self) -> "webdriver.Chrome":
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                return self._create_driver()
+            if self._is_alive(driver):
+                return driver
+            print("♻️ Replacing crashed Chrome driver")
+            tracing.inc("chrome_drivers_recycled_total", reason="crashed")
+            self._discard(driver)
+
+    def _checkin(self, driver: "webdriver.Chrome", failed: bool) -> None:
+        pages = self._page_counts.get(id(driver), 0) + 1
+        self._page_counts[id(driver)] = pages
+
+        if self._closed or pages >= self.max_pages_per_driver or (failed and not self._is_alive(driver)):
+            tracing.inc("chrome_drivers_recycled_total", reason="closed" if self._closed else "failed" if failed else "max_pages")
+            self._discard(driver)
+            return
+
+        try:
+            # Drop per-site state before the next lease
+            driver.delete_all_cookies()
+        except Exception:
+            self._discard(driver)
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    @contextmanager
+    def lease(self):
+        """Borrows a warm driver for one page and returns it to the pool afterwards."""
+        if self._closed:
+            raise RuntimeError("Chrome driver pool is closed")
+        waited = time.perf_counter()
+        self._slots.acquire()
+        tracing.queue_wait("chrome_pool", waited)
+        try:
+            driver = self._checkout()
+            failed = False
+            try:
+                yield driver
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self._checkin(driver, failed)
+        finally:
+            self._slots.release()
+
+    def prewarm(self, count: Optional[int] = None) -> int:
+        """Starts idle drivers ahead of the first lease (long-lived servers); returns the idle count."""
+        target = min(self.max_size, count or self.max_size)
+        while True:
+            with self._lock:
+                if self._closed or len(self._idle) >= target:
+                    return len(self._idle)
+            driver = self._create_driver()
+            with self._lock:
+                self._idle.append(driver)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+
+# ----------------------------
+# Process-wide shared pool
+# ----------------------------
+_pool: Optional[ChromeDriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> ChromeDriverPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ChromeDriverPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,155 @@
+# frontier.py
+# Crawl frontier hints gathered without rendering anything: robots.txt rules,
+# sitemap.xml (and sitemap index) URLs, and a path-keyword score so the page
+# budget goes to about/product/mission pages before login, careers, legal or
+# locale duplicates. Binary and asset URLs never enter the frontier.
+
+import os
+import re
+import gzip
+import asyncio
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
+
+from . import tracing
+
+SITEMAP_ENABLED = os.getenv("CRAWL_USE_SITEMAP", "1") != "0"
+SITEMAP_MAX_FILES = 10
+SITEMAP_MAX_URLS = 500
+ROBOTS_AGENT = "*"
+
+# Path keyword -> score; the best match in any path segment wins
+KEYWORD_SCORES = {
+    "about": 5, "company": 4, "mission": 5, "values": 4, "story": 4, "who-we-are": 5,
+    "products": 5, "product": 5, "shop": 3, "collections": 3, "services": 4, "solutions": 4,
+    "sustainability": 5, "impact": 4, "ingredients": 4, "certifications": 4,
+    "partners": 3, "wholesale": 3, "retailers": 3, "stockists": 3, "press": 2, "news": 1, "blog": 1,
+}
+PENALTY_SCORES = {
+    "login": -10, "signin": -10, "sign-in": -10, "signup": -10, "register": -10, "account": -10,
+    "cart": -10, "checkout": -10, "wishlist": -8, "search": -6, "tag": -4, "author": -4,
+    "careers": -6, "jobs": -6, "legal": -6, "privacy": -6, "terms": -6, "cookie": -6, "cookies": -6,
+    "policy": -5, "accessibility": -5, "sitemap": -5,
+}
+SKIP_EXTENSIONS = frozenset((
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".bmp", ".tif", ".tiff", ".avif",
+    ".mp4", ".mov", ".webm", ".mp3", ".wav", ".ogg",
+    ".pdf", ".zip", ".gz", ".tar", ".rar", ".7z", ".dmg", ".exe", ".msi",
+    ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".csv",
+    ".css", ".js", ".json", ".xml", ".txt", ".rss", ".atom", ".woff", ".woff2", ".ttf", ".eot",
+))
+LOCALE_SEGMENT = re.compile(r"^[a-z]{2}(?:[-_][a-z]{2})?$")
+ENGLISH_LOCALES = ("en", "en-us", "en_us")
+SITEMAP_NS = re.compile(r"^\{[^}]*\}")
+
+
+# ----------------------------
+# URL scoring
+# ----------------------------
+def is_crawlable(url: str) -> bool:
+    path = urlparse(url).path.lower()
+    return os.path.splitext(path)[1] not in SKIP_EXTENSIONS
+
+
+def score_url(url: str) -> float:
+    """Higher is better; the homepage scores highest, skipped and boilerplate paths go negative."""
+    segments = [s for s in urlparse(url).path.lower().split("/") if s]
+    if not segments:
+        return 10.0
+
+    score = 0.0
+    if LOCALE_SEGMENT.match(segments[0]) and segments[0] not in ENGLISH_LOCALES:
+        score -= 8
+    words = set()
+    for segment in segments:
+        words.add(segment)
+        words.update(w for w in re.split(r"[-_.]", segment) if w)
+    positive = [value for key, value in KEYWORD_SCORES.items() if key in words]
+    negative = [value for key, value in PENALTY_SCORES.items() if key in words]
+    score += max(positive, default=0) + min(negative, default=0)
+    # Deep pages (individual posts, product variants) rank below section pages
+    score -= 0.5 * max(0, len(segments) - 2)
+    return score
+
+
+# ----------------------------
+# robots.txt and sitemaps
+# ----------------------------
+class SiteHints:
+    """robots.txt rules plus sitemap URLs for one site; empty hints allow everything."""
+
+    def __init__(self, robots: Optional[RobotFileParser] = None, urls: Optional[List[str]] = None):
+        self.robots = robots
+        self.urls = urls or []
+
+    def allowed(self, url: str) -> bool:
+        return self.robots is None or self.robots.can_fetch(ROBOTS_AGENT, url)
+
+
+async def _get_text(client, url: str) -> Optional[str]:
+    try:
+        response = await client.get(url)
+    except Exception as e:
+        print(f"⚠️ Could not fetch {url}: {e}")
+        return None
+    if response.status_code != 200:
+        return None
+    body = response.content
+    if body[:2] == b"\x1f\x8b":
+        body = await asyncio.to_thread(gzip.decompress, body)
+    return body.decode(response.encoding or "utf-8", errors="replace")
+
+
+def parse_sitemap(xml_text: str) -> Tuple[List[str], List[str]]:
+    """Returns (page URLs, nested sitemap URLs) from a urlset or sitemapindex document."""
+    try:
+        root = ET.fromstring(xml_text.strip())
+    except ET.ParseError:
+        return [], []
+    pages: List[str] = []
+    sitemaps: List[str] = []
+    is_index = SITEMAP_NS.sub("", root.tag) == "sitemapindex"
+    for element in root.iter():
+        if SITEMAP_NS.sub("", element.tag) == "loc" and element.text:
+            (sitemaps if is_index else pages).append(element.text.strip())
+    return pages, sitemaps
+
+
+async def discover_site(client, base_url: str) -> SiteHints:
+    """Reads robots.txt and walks sitemaps breadth-first, capped by file and URL counts."""
+    root = urljoin(base_url, "/")
+    robots = None
+    sitemap_queue: List[str] = []
+
+    with tracing.span("crawl.discover", url=root):
+        robots_text = await _get_text(client, urljoin(root, "/robots.txt"))
+        if robots_text is not None:
+            robots = RobotFileParser()
+            robots.parse(robots_text.splitlines())
+            sitemap_queue.extend(robots.site_maps() or [])
+        if not sitemap_queue:
+            sitemap_queue.append(urljoin(root, "/sitemap.xml"))
+
+        urls: List[str] = []
+        seen = set()
+        fetched = 0
+        while sitemap_queue and fetched < SITEMAP_MAX_FILES and len(urls) < SITEMAP_MAX_URLS:
+            sitemap_url = sitemap_queue.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            fetched += 1
+            xml_text = await _get_text(client, sitemap_url)
+            if not xml_text:
+                continue
+            pages, nested = parse_sitemap(xml_text)
+            # Index files list product/post sitemaps last; the page sitemap usually comes first
+            sitemap_queue.extend(nested)
+            urls.extend(pages[:SITEMAP_MAX_URLS - len(urls)])
+
+    print(f"🗺️ Frontier hints for {root}: robots.txt {'found' if robots else 'missing'}, "
+          f"{len(urls)} sitemap URLs from {fetched} file(s)")
+    tracing.inc("sitemap_urls_total", len(urls))
+    return SiteHints(robots, urls)
@@ -1,21 +1,39 @@
 # hacker_news_tool.py
 
+import os
+import re
+import time
 import asyncio
+import weakref
+from collections import OrderedDict
 import httpx
+import numpy as np
 from pydantic import BaseModel, HttpUrl
-from typing import List
+from typing import Dict, List, Optional, Pattern, Tuple
 from pydantic_ai import Tool
-from datetime import datetime, timezone
-from dotenv import load_dotenv
-from rapidfuzz import fuzz
-import re
+from rapidfuzz import fuzz, process
 
-load_dotenv()
+from . import tracing
+
+HN_SEARCH_URL = os.getenv("HN_SEARCH_URL", "https://hn.algolia.com/api/v1/search")
+HN_CONCURRENCY = int(os.getenv("HN_CONCURRENCY", "8"))
+HN_CACHE_TTL = float(os.getenv("HN_CACHE_TTL", "3600"))
+HN_CACHE_MAX_ENTRIES = 2048
+HN_HITS_PER_PAGE = 100
+HN_MAX_PAGES = 2
+FUZZY_THRESHOLD = 70  # more permissive
 
 # INPUT schema
 class HNScrapeInput(BaseModel):
     company: str
 
+# Bulk INPUT schema
+class HNBulkInput(BaseModel):
+    companies: List[str]
+    recency_days: Optional[int] = None  # only stories from the last N days
+    hits_per_page: int = HN_HITS_PER_PAGE
+    max_pages: int = HN_MAX_PAGES
+
 # OUTPUT schema for each article
 class HackerNewsArticle(BaseModel):
     id: str
@@ -30,57 +48,129 @@ class HNScrapeOutput(BaseModel):
     hn_articles: List[HackerNewsArticle]
 
 # Helper: require company name to be a full phrase match in title
+def company_pattern(company: str) -> Pattern:
+    return re.compile(rf'\b{re.escape(company)}\b', re.IGNORECASE)
+
 def company_name_in_title(company: str, title: str) -> bool:
-    pattern = re.compile(rf'\b{re.escape(company)}\b', re.IGNORECASE)
-    return bool(pattern.search(title))
+    return bool(company_pattern(company).search(title))
 
-# ✅ Raw logic exposed for testing/debugging
-async def hn_scrape_logic(input: HNScrapeInput) -> HNScrapeOutput:
-    company = input.company.strip()
-    url = f"https://hn.algolia.com/api/v1/search?query={company}&tags=story"
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-    except Exception as e:
-        print(f"❌ Error fetching Hacker News data for {company}: {e}")
-        return HNScrapeOutput(hn_articles=[])
-
-    hits = data.get("hits", [])
-    articles = []
-    fuzzy_threshold = 70  # more permissive
-
-    for post in hits:
-        try:
-            title = post.get("title") or post.get("story_title") or ""
-            if not title:
-                continue
+# ----------------------------
+# Shared client, bounded concurrency and per-query cache
+# ----------------------------
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+_query_cache: "OrderedDict[Tuple, Tuple[float, List[dict]]]" = OrderedDict()
 
-            fuzzy_score = fuzz.token_set_ratio(company.lower(), title.lower())
-            if fuzzy_score < fuzzy_threshold:
-                continue
+def _get_client() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=HN_CONCURRENCY, max_keepalive_connections=HN_CONCURRENCY),
+        )
+        entry = _clients[loop] = (client, asyncio.Semaphore(HN_CONCURRENCY))
+    return entry
 
-            if not company_name_in_title(company, title):
-                continue
+async def close_clients() -> None:
+    entry = _clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].aclose()
+
+async def _search_hits(company: str, hits_per_page: int, max_pages: int, recency_days: Optional[int]) -> List[dict]:
+    key = (company.lower(), hits_per_page, max_pages, recency_days)
+    cached = _query_cache.get(key)
+    if cached and time.time() - cached[0] < HN_CACHE_TTL:
+        tracing.cache_lookup("hn_query", True)
+        _query_cache.move_to_end(key)
+        return cached[1]
+    tracing.cache_lookup("hn_query", False)
+
+    client, slots = _get_client()
+    params = {"query": company, "tags": "story", "hitsPerPage": hits_per_page}
+    if recency_days:
+        params["numericFilters"] = f"created_at_i>{int(time.time()) - recency_days * 86400}"
 
-            articles.append(HackerNewsArticle(
-                id=post.get("objectID", ""),
-                author=post.get("author", ""),
-                url=post.get("url") or f"https://news.ycombinator.com/item?id={post.get('objectID', '')}",
-                created_at=post.get("created_at", ""),
-                num_comments=post.get("num_comments", 0),
-                title=title
-            ))
-        except Exception as parse_err:
-            print(f"⚠️ Skipping malformed post: {parse_err}")
+    hits: List[dict] = []
+    for page in range(max_pages):
+        waited = time.perf_counter()
+        async with slots:
+            tracing.queue_wait("hn", waited)
+            with tracing.span("hn.search", query=company, page=page):
+                response = await client.get(HN_SEARCH_URL, params={**params, "page": page})
+        response.raise_for_status()
+        data = response.json()
+        hits.extend(data.get("hits", []))
+        if page + 1 >= data.get("nbPages", 0):
+            break
+
+    _query_cache[key] = (time.time(), hits)
+    _query_cache.move_to_end(key)
+    while len(_query_cache) > HN_CACHE_MAX_ENTRIES:
+        _query_cache.popitem(last=False)
+    return hits
+
+def _to_article(post: dict, title: str) -> HackerNewsArticle:
+    return HackerNewsArticle(
+        id=post.get("objectID", ""),
+        author=post.get("author", ""),
+        url=post.get("url") or f"https://news.ycombinator.com/item?id={post.get('objectID', '')}",
+        created_at=post.get("created_at", ""),
+        num_comments=post.get("num_comments") or 0,
+        title=title
+    )
+
+# ✅ Bulk lookup: one pooled client, all titles scored against all companies at once
+async def hn_bulk_search(input: HNBulkInput) -> Dict[str, HNScrapeOutput]:
+    companies = [c.strip() for c in input.companies if c.strip()]
+    results = await asyncio.gather(
+        *(_search_hits(c, input.hits_per_page, input.max_pages, input.recency_days) for c in companies),
+        return_exceptions=True
+    )
+
+    posts: Dict[str, Tuple[dict, str]] = {}
+    for company, hits in zip(companies, results):
+        if isinstance(hits, Exception):
+            print(f"❌ Error fetching Hacker News data for {company}: {hits}")
             continue
+        for post in hits:
+            title = post.get("title") or post.get("story_title") or ""
+            if title:
+                posts.setdefault(post.get("objectID") or title, (post, title))
+
+    output = {company: HNScrapeOutput(hn_articles=[]) for company in companies}
+    if not posts or not companies:
+        return output
+
+    entries = list(posts.values())
+    titles = [title.lower() for _, title in entries]
+    with tracing.span("hn.score", companies=len(companies), titles=len(titles)):
+        scores = process.cdist([c.lower() for c in companies], titles, scorer=fuzz.token_set_ratio, workers=-1)
+    patterns = [company_pattern(c) for c in companies]
 
-    return HNScrapeOutput(hn_articles=articles)
+    for i, company in enumerate(companies):
+        for j in np.nonzero(scores[i] >= FUZZY_THRESHOLD)[0]:
+            post, title = entries[j]
+            if not patterns[i].search(title):
+                continue
+            try:
+                output[company].hn_articles.append(_to_article(post, title))
+            except Exception as parse_err:
+                print(f"⚠️ Skipping malformed post: {parse_err}")
+    return output
+
+# ✅ Raw logic exposed for testing/debugging
+async def hn_scrape_logic(input: HNScrapeInput) -> HNScrapeOutput:
+    company = input.company.strip()
+    results = await hn_bulk_search(HNBulkInput(companies=[company]))
+    return results.get(company, HNScrapeOutput(hn_articles=[]))
 
 # ✅ Tool-wrapped version used by the agent
 @Tool
 async def hn_scrape_tool(input: HNScrapeInput) -> HNScrapeOutput:
     """Searches Hacker News for articles mentioning a given company."""
     return await hn_scrape_logic(input)
+
+@Tool
+async def hn_bulk_scrape_tool(input: HNBulkInput) -> Dict[str, HNScrapeOutput]:
+    """Searches Hacker News for articles mentioning any of the given companies."""
+    return await hn_bulk_search(input)
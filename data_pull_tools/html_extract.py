@@ -0,0 +1,141 @@
+# html_extract.py
+# BeautifulSoup helpers shared by the website scrapers. supervisor/access.py
+# re-exports them so existing callers keep working.
+#
+# extract_page parses a document once and returns its visible text blocks and
+# absolute links together. lxml is used as the parser backend when it is
+# installed. Parsing is CPU-bound, so callers on the event loop (or holding a
+# Chrome lease) hand it to a bounded process pool via parse_page/parse_page_sync.
+
+import os
+import asyncio
+import weakref
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from . import tracing
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+PARSE_WORKERS = int(os.getenv("HTML_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages smaller than this parse faster than they pickle across processes
+INLINE_PARSE_BYTES = int(os.getenv("HTML_INLINE_PARSE_BYTES", "20000"))
+STRIP_TAGS = ["script", "style", "noscript", "template"]
+
+
+def extract_body_content(html_content: str) -> str:
+    soup = BeautifulSoup(html_content, PARSER)
+    body = soup.body or soup
+    return str(body)
+
+
+def clean_body_content(body_content: str) -> str:
+    soup = BeautifulSoup(body_content, PARSER)
+    for tag in soup(["script", "style"]):
+        tag.extract()
+    text = soup.get_text(separator="\n")
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def extract_page(html: str, base_url: str = "") -> Tuple[List[str], List[str]]:
+    """Single parse: returns (visible text blocks of <body>, unique absolute http(s) links)."""
+    soup = BeautifulSoup(html, PARSER)
+
+    links: List[str] = []
+    seen = set()
+    for a in soup.find_all("a", href=True):
+        href = urljoin(base_url, a["href"].strip()) if base_url else a["href"].strip()
+        if href.startswith("http") and href not in seen:
+            seen.add(href)
+            links.append(href)
+
+    body = soup.body or soup
+    for tag in body(STRIP_TAGS):
+        tag.decompose()
+    text = body.get_text(separator="\n")
+    text_blocks = [line.strip() for line in text.splitlines() if line.strip()]
+    return text_blocks, links
+
+
+# ----------------------------
+# Process pool
+# ----------------------------
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Caps pages queued for the pool per event loop so large HTML strings do not pile up in memory
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared parse pool; None when HTML_PARSE_WORKERS=0 (parse in the calling thread)."""
+    global _pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that holds Chrome sessions and event loop threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _use_pool(html: str) -> Optional[ProcessPoolExecutor]:
+    return get_parse_pool() if len(html) >= INLINE_PARSE_BYTES else None
+
+
+def parse_page_sync(html: str, base_url: str = "") -> Tuple[List[str], List[str]]:
+    """Blocking variant for worker threads; waits on the pool instead of holding the GIL."""
+    pool = _use_pool(html)
+    with tracing.span("html.parse", bytes=len(html), pooled=pool is not None):
+        if pool is None:
+            return extract_page(html, base_url)
+        try:
+            return pool.submit(extract_page, html, base_url).result()
+        except BrokenProcessPool:
+            _reset_pool(pool)
+            return extract_page(html, base_url)
+
+
+async def parse_page(html: str, base_url: str = "") -> Tuple[List[str], List[str]]:
+    """Parses off the event loop: in the process pool for large pages, inline for small ones."""
+    pool = _use_pool(html)
+    if pool is None:
+        with tracing.span("html.parse", bytes=len(html), pooled=False):
+            return extract_page(html, base_url)
+
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.get(loop)
+    if inflight is None:
+        inflight = _inflight[loop] = asyncio.Semaphore(PARSE_WORKERS * 2)
+    async with inflight:
+        with tracing.span("html.parse", bytes=len(html), pooled=True):
+            try:
+                return await loop.run_in_executor(pool, extract_page, html, base_url)
+            except BrokenProcessPool:
+                _reset_pool(pool)
+                return await asyncio.to_thread(extract_page, html, base_url)
@@ -0,0 +1,224 @@
+# llm_gateway.py
+# Single entry point for every Ollama call in the pipeline. One pooled
+# httpx.AsyncClient per event loop, a semaphore sized to the server's
+# parallel slots (OLLAMA_NUM_PARALLEL), keep-alive so the model stays
+# loaded between calls, and retries with exponential backoff. Completed
+# responses are memoized in the persistent LLM response cache.
+
+import os
+import json
+import time
+import random
+import asyncio
+import weakref
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from . import tracing
+from .llm_cache import LLMResponseCache, cache_key, get_llm_cache
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+EMBED_BATCH_SIZE = 64
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "1"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_TIMEOUT = httpx.Timeout(connect=5.0, read=float(os.getenv("OLLAMA_READ_TIMEOUT", "600")), write=30.0, pool=None)
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+class OllamaError(RuntimeError):
+    pass
+
+
+def _check_status(response: httpx.Response, what: str) -> None:
+    # Callers handle OllamaError; an exhausted retry on a 5xx must not leak httpx.HTTPStatusError
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise OllamaError(f"Ollama {what} failed with HTTP {response.status_code}") from e
+
+
+class OllamaGateway:
+    def __init__(self, host: str = OLLAMA_HOST, parallel: int = OLLAMA_NUM_PARALLEL,
+                 keep_alive: str = OLLAMA_KEEP_ALIVE, max_retries: int = MAX_RETRIES,
+                 cache: Optional[LLMResponseCache] = None):
+        self.host = host.rstrip("/")
+        self.cache = cache
+        self.keep_alive = keep_alive
+        self.max_retries = max_retries
+        self._slots = asyncio.Semaphore(max(1, parallel))
+        self._client = httpx.AsyncClient(
+            base_url=self.host,
+            timeout=OLLAMA_TIMEOUT,
+            limits=httpx.Limits(max_connections=max(1, parallel) * 2, max_keepalive_connections=max(1, parallel)),
+        )
+
+    def _payload(self, messages: List[Dict], model: Optional[str], options: Optional[Dict],
+                 format: Optional[object], stream: bool) -> Dict:
+        payload = {
+            "model": model or OLLAMA_MODEL,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+        }
+        if options:
+            payload["options"] = options
+        if format is not None:
+            payload["format"] = format
+        return payload
+
+    async def _backoff(self, attempt: int) -> None:
+        await asyncio.sleep(BACKOFF_BASE * (2 ** attempt) + random.uniform(0, BACKOFF_BASE))
+
+    def _cache_key(self, payload: Dict) -> str:
+        return cache_key(payload["model"], payload["messages"], payload.get("options"), payload.get("format"))
+
+    async def chat(self, messages: List[Dict], model: Optional[str] = None, options: Optional[Dict] = None,
+                   format: Optional[object] = None, use_cache: bool = True) -> Dict:
+        """Non-streaming /api/chat call; returns Ollama's full response JSON."""
+        payload = self._payload(messages, model, options, format, stream=False)
+        key = self._cache_key(payload) if self.cache and use_cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                waited = time.perf_counter()
+                async with self._slots:
+                    tracing.queue_wait("ollama", waited)
+                    with tracing.span("ollama.chat", model=payload["model"], attempt=attempt):
+                        response = await self._client.post("/api/chat", json=payload)
+                if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                    await self._backoff(attempt)
+                    continue
+                _check_status(response, "chat")
+                result = response.json()
+                tracing.record_ollama(result, "chat")
+                if key and result.get("message", {}).get("content"):
+                    self.cache.put(key, payload["model"], result)
+                return result
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise OllamaError(f"Ollama unreachable after {attempt + 1} attempts: {e}") from e
+                await self._backoff(attempt)
+        raise OllamaError("Ollama request failed")
+
+    async def chat_text(self, messages: List[Dict], **kwargs) -> str:
+        result = await self.chat(messages, **kwargs)
+        return result["message"]["content"].strip()
+
+    async def stream_chat(self, messages: List[Dict], model: Optional[str] = None, options: Optional[Dict] = None,
+                          format: Optional[object] = None, use_cache: bool = True) -> AsyncIterator[Dict]:
+        """Streaming /api/chat call; yields each NDJSON chunk. Retries only before the first chunk arrives.
+
+        A cache hit is replayed as a single final chunk.
+        """
+        payload = self._payload(messages, model, options, format, stream=True)
+        key = self._cache_key(payload) if self.cache and use_cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        parts: List[str] = []
+        for attempt in range(self.max_retries + 1):
+            started = False
+            retry = False
+            try:
+                waited = time.perf_counter()
+                async with self._slots:
+                    tracing.queue_wait("ollama", waited)
+                    # Timed by hand: a span's context must not stay open across the yields below
+                    started_at = time.perf_counter()
+                    async with self._client.stream("POST", "/api/chat", json=payload) as response:
+                        if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                            retry = True
+                        else:
+                            _check_status(response, "chat stream")
+                            async for line in response.aiter_lines():
+                                if not line.strip():
+                                    continue
+                                try:
+                                    chunk = json.loads(line)
+                                except json.JSONDecodeError:
+                                    continue
+                                if not started:
+                                    tracing.observe("ollama_first_token_seconds", time.perf_counter() - started_at)
+                                started = True
+                                parts.append(chunk.get("message", {}).get("content", ""))
+                                if chunk.get("done"):
+                                    tracing.record_ollama(chunk, "chat_stream")
+                                    tracing.observe("span_seconds", time.perf_counter() - started_at, span="ollama.stream_chat")
+                                if key and chunk.get("done") and "".join(parts).strip():
+                                    final = dict(chunk)
+                                    final["message"] = {"role": "assistant", "content": "".join(parts)}
+                                    self.cache.put(key, payload["model"], final)
+                                yield chunk
+            except httpx.TransportError as e:
+                if started or attempt >= self.max_retries:
+                    raise OllamaError(f"Ollama stream failed: {e}") from e
+                retry = True
+            if not retry:
+                return
+            await self._backoff(attempt)
+
+    async def embed(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """Embeds texts via /api/embed in batches; returns one vector per input."""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            payload = {
+                "model": model or OLLAMA_EMBED_MODEL,
+                "input": texts[start:start + EMBED_BATCH_SIZE],
+                "keep_alive": self.keep_alive,
+            }
+            for attempt in range(self.max_retries + 1):
+                try:
+                    waited = time.perf_counter()
+                    async with self._slots:
+                        tracing.queue_wait("ollama", waited)
+                        with tracing.span("ollama.embed", model=payload["model"], inputs=len(payload["input"])):
+                            response = await self._client.post("/api/embed", json=payload)
+                    if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                        await self._backoff(attempt)
+                        continue
+                    _check_status(response, "embeddings")
+                    result = response.json()
+                    tracing.record_ollama(result, "embed")
+                    vectors.extend(result["embeddings"])
+                    break
+                except httpx.TransportError as e:
+                    if attempt >= self.max_retries:
+                        raise OllamaError(f"Ollama embeddings failed: {e}") from e
+                    await self._backoff(attempt)
+        return vectors
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# ----------------------------
+# One gateway per event loop (httpx clients and semaphores are loop-bound)
+# ----------------------------
+_gateways: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OllamaGateway]" = weakref.WeakKeyDictionary()
+
+
+def get_llm_gateway() -> OllamaGateway:
+    loop = asyncio.get_running_loop()
+    gateway = _gateways.get(loop)
+    if gateway is None:
+        gateway = _gateways[loop] = OllamaGateway(cache=get_llm_cache())
+    return gateway
+
+
+async def close_clients() -> None:
+    """Closes the running loop's gateway client; the next get_llm_gateway() starts a fresh one."""
+    gateway = _gateways.pop(asyncio.get_running_loop(), None)
+    if gateway is not None:
+        await gateway.aclose()
@@ -0,0 +1,253 @@
+# page_cache.py
+# Persistent page cache shared by the website scrapers. Entries are keyed by
+# normalized URL and hold the extracted WebsiteContent, a content hash, the
+# ETag/Last-Modified validators and the fetch time. Stale entries are
+# revalidated with conditional GETs, or by comparing the content hash when the
+# server sends no validators. Pages and site summaries share one size bound
+# and are evicted least-recently-used first; summaries unused for a TTL expire.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from .crawler import url_key
+
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(".cache", "page_cache.sqlite3"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", str(7 * 24 * 3600)))
+PAGE_CACHE_MAX_BYTES = int(float(os.getenv("PAGE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+PAGE_CACHE_DISABLED = os.getenv("PAGE_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+
+class CachedPage(BaseModel):
+    url: str
+    content: Dict
+    content_hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float
+
+
+def content_digest(text_blocks: Iterable[str]) -> str:
+    h = hashlib.sha256()
+    for block in text_blocks:
+        h.update(block.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def conditional_headers(entry: Optional[CachedPage]) -> Dict[str, str]:
+    headers = {}
+    if entry and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+class PageCache:
+    def __init__(self, path: str = PAGE_CACHE_PATH, ttl: float = PAGE_CACHE_TTL, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content TEXT NOT NULL,
+                content_hash TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_accessed ON pages(accessed_at);
+            CREATE TABLE IF NOT EXISTS summaries (
+                digest TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        # Caches created before summaries were size-accounted lack the column
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(summaries)")}
+        if "size" not in columns:
+            self._db.execute("ALTER TABLE summaries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("UPDATE summaries SET size = LENGTH(CAST(summary AS BLOB))")
+        self._db.commit()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return url_key(url)
+
+    def is_fresh(self, entry: CachedPage) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    # ----------------------------
+    # Pages
+    # ----------------------------
+    def get(self, url: str) -> Optional[CachedPage]:
+        entry = self.peek(url)
+        if entry is not None:
+            with self._lock:
+                self._db.execute("UPDATE pages SET accessed_at = ? WHERE url_key = ?", (time.time(), self._key(url)))
+                self._db.commit()
+        return entry
+
+    def peek(self, url: str) -> Optional[CachedPage]:
+        """Like get, but read-only: does not bump the entry's LRU position or write to the database."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, content, content_hash, etag, last_modified, fetched_at FROM pages WHERE url_key = ?",
+                (self._key(url),)
+            ).fetchone()
+        if row is None:
+            return None
+
+        return CachedPage(
+            url=row[0],
+            content=json.loads(row[1]),
+            content_hash=row[2],
+            etag=row[3],
+            last_modified=row[4],
+            fetched_at=row[5]
+        )
+
+    def put(self, url: str, content: Dict, content_hash: Optional[str] = None,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        payload = json.dumps(content, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(url), url, payload, content_hash, etag, last_modified, now, now, len(payload.encode("utf-8")))
+            )
+            self._evict()
+            self._db.commit()
+
+    def touch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Marks an entry as freshly revalidated."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url_key = ?",
+                (now, now, etag, last_modified, self._key(url))
+            )
+            self._db.commit()
+
+    def _evict(self) -> None:
+        """Expires idle summaries, then drops least-recently-used pages and summaries until under max_bytes."""
+        self._db.execute("DELETE FROM summaries WHERE accessed_at < ?", (time.time() - self.ttl,))
+        total = self._db.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM pages) + (SELECT COALESCE(SUM(size), 0) FROM summaries)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT 'pages', url_key, size, accessed_at FROM pages "
+            "UNION ALL SELECT 'summaries', digest, size, accessed_at FROM summaries "
+            "ORDER BY accessed_at ASC"
+        ).fetchall()
+        evicted: Dict[str, List[Tuple[str]]] = {"pages": [], "summaries": []}
+        for table, key, size, _ in rows:
+            if total <= self.max_bytes:
+                break
+            evicted[table].append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM pages WHERE url_key = ?", evicted["pages"])
+        self._db.executemany("DELETE FROM summaries WHERE digest = ?", evicted["summaries"])
+
+    # ----------------------------
+    # Site summaries keyed by the digest of their input text
+    # ----------------------------
+    def get_summary(self, digest: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM summaries WHERE digest = ?", (digest,)).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE summaries SET accessed_at = ? WHERE digest = ?", (time.time(), digest))
+                self._db.commit()
+        return row[0] if row else None
+
+    def put_summary(self, digest: str, summary: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (digest, summary, accessed_at, size) VALUES (?, ?, ?, ?)",
+                (digest, summary, time.time(), len(summary.encode("utf-8")))
+            )
+            self._evict()
+            self._db.commit()
+
+    # ----------------------------
+    # Blocking revalidation for callers outside the event loop
+    # ----------------------------
+    def revalidate(self, entry: CachedPage, timeout: float = 10.0) -> bool:
+        """Returns True (and refreshes the entry) when the page is unchanged.
+
+        Unchanged means a 304 to the conditional GET or, when the server ignores or lacks
+        validators, a 200 whose extracted text hashes to the stored content_hash.
+        """
+        headers = conditional_headers(entry)
+        if not headers and not entry.content_hash:
+            return False
+        try:
+            response = httpx.get(entry.url, headers=headers, follow_redirects=True, timeout=timeout)
+        except Exception:
+            return False
+        etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+        if response.status_code == 304:
+            self.touch(entry.url, etag, last_modified)
+            return True
+        if response.status_code == 200 and entry.content_hash and "html" in response.headers.get("content-type", ""):
+            # Imported here so loading the cache (e.g. for the company index) does not pull in BeautifulSoup
+            from .html_extract import parse_page_sync
+            text_blocks, _ = parse_page_sync(response.text, str(response.url))
+            if content_digest(text_blocks) == entry.content_hash:
+                self.touch(entry.url, etag, last_modified)
+                return True
+        return False
+
+    @staticmethod
+    def fetch_validators(url: str, timeout: float = 10.0) -> Tuple[Optional[str], Optional[str]]:
+        """HEAD request for ETag/Last-Modified, for pages that were rendered in a browser."""
+        try:
+            response = httpx.head(url, follow_redirects=True, timeout=timeout)
+        except Exception:
+            return None, None
+        if response.status_code >= 400:
+            return None, None
+        return response.headers.get("etag"), response.headers.get("last-modified")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# ----------------------------
+# Process-wide shared cache
+# ----------------------------
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    global _cache
+    if PAGE_CACHE_DISABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache()
+        return _cache
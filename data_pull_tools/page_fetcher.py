@@ -0,0 +1,105 @@
+# page_fetcher.py
+# Plain HTTP page fetching for the website scraper. Static pages are parsed
+# once by html_extract.parse_page (off the event loop for large pages); pages
+# that look JavaScript-rendered are handed back so the caller can fall back
+# to Chrome.
+
+import re
+import asyncio
+import weakref
+from typing import Dict, List, Optional
+
+import httpx
+from pydantic import BaseModel
+
+from .html_extract import parse_page
+from .page_cache import content_digest
+
+FETCH_MODES = ("auto", "http", "browser")
+HTTP_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+
+# Heuristic thresholds for "this page needs a real browser"
+MIN_TEXT_CHARS = 300
+SPA_TEXT_CHARS = 1500
+SPA_ROOT_MARKERS = (
+    'id="root"', "id='root'",
+    'id="app"', "id='app'",
+    'id="__next"', "id='__next'",
+    'id="__nuxt"', "window.__NUXT__",
+    "ng-version=", "ng-app",
+    "data-reactroot", 'id="___gatsby"',
+)
+NOSCRIPT_BLOCK = re.compile(r"<noscript[^>]*>(.*?)</noscript>", re.IGNORECASE | re.DOTALL)
+
+
+class StaticPage(BaseModel):
+    text_blocks: List[str] = []
+    links: List[str] = []
+    needs_browser: bool = False
+    not_modified: bool = False
+    content_hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def new_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(follow_redirects=True, timeout=HTTP_TIMEOUT, headers=DEFAULT_HEADERS)
+
+
+# One pooled client per event loop so keep-alive connections survive across crawls
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = new_http_client()
+    return client
+
+
+async def close_clients() -> None:
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def needs_javascript(html: str, text_blocks: List[str]) -> bool:
+    text_chars = sum(len(block) for block in text_blocks)
+    if text_chars < MIN_TEXT_CHARS:
+        return True
+    if text_chars < SPA_TEXT_CHARS and any("javascript" in block.lower() for block in NOSCRIPT_BLOCK.findall(html)):
+        return True
+    if text_chars < SPA_TEXT_CHARS and any(marker in html for marker in SPA_ROOT_MARKERS):
+        return True
+    return False
+
+
+async def fetch_static_page(client: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]] = None) -> StaticPage:
+    """Fetches a page without a browser; pass conditional headers to revalidate a cached copy."""
+    response = await client.get(url, headers=headers)
+    validators = {
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+    }
+    if response.status_code == 304:
+        return StaticPage(not_modified=True, **validators)
+    response.raise_for_status()
+
+    # PDFs, images and feeds have no page text to render; keep them away from the browser pool
+    if "html" not in response.headers.get("content-type", ""):
+        return StaticPage(content_hash=content_digest([]), **validators)
+
+    html = response.text
+    text_blocks, links = await parse_page(html, str(response.url))
+    return StaticPage(
+        text_blocks=text_blocks,
+        links=links,
+        needs_browser=needs_javascript(html, text_blocks),
+        content_hash=content_digest(text_blocks),
+        **validators
+    )
@@ -0,0 +1,112 @@
+# passage_ranker.py
+# Intent-aware context packing. Long scraped text is split into sentence-
+# aligned passages, scored against the user's intent with BM25 over an
+# in-memory inverted index, and the best passages are packed greedily into a
+# token budget. Chosen passages are emitted in their original order so the
+# summary prompt still reads coherently.
+
+import os
+import re
+import math
+from typing import Dict, List, Tuple
+
+from .summarizer import estimate_tokens, split_sentences
+
+CONTEXT_BUDGET_TOKENS = int(os.getenv("CONTEXT_BUDGET_TOKENS", "3000"))
+PASSAGE_TOKENS = 120
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its my of on or our so that the their this to "
+    "was we what which who will with you your user assistant".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    terms = []
+    for token in TOKEN.findall(text.lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        # Cheap plural folding so "balms" matches "balm"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def split_passages(text: str, max_tokens: int = PASSAGE_TOKENS) -> List[str]:
+    passages: List[str] = []
+    current: List[str] = []
+    size = 0
+    for sentence in split_sentences(text):
+        cost = estimate_tokens(sentence) + 1
+        if current and size + cost > max_tokens:
+            passages.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += cost
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+class BM25Index:
+    def __init__(self, passages: List[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+        for doc_id, passage in enumerate(passages):
+            counts: Dict[str, int] = {}
+            terms = tokenize(passage)
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+            self.lengths.append(len(terms))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def idf(self, term: str) -> float:
+        n = len(self.lengths)
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> List[float]:
+        scores = [0.0] * len(self.lengths)
+        if not self.avg_length:
+            return scores
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+
+def pack_passages(passages: List[str], scores: List[float], budget_tokens: int) -> List[str]:
+    """Greedy by score (ties keep page order); returns the chosen passages in original order."""
+    order = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+    chosen: List[int] = []
+    used = 0
+    for i in order:
+        cost = estimate_tokens(passages[i]) + 1
+        if used + cost > budget_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+    return [passages[i] for i in sorted(chosen)]
+
+
+def select_context(text: str, intent: str, budget_tokens: int = CONTEXT_BUDGET_TOKENS) -> str:
+    """Returns the passages of text most relevant to intent that fit in budget_tokens."""
+    if not intent.strip() or estimate_tokens(text) <= budget_tokens:
+        return text
+    passages = split_passages(text)
+    selected = pack_passages(passages, BM25Index(passages).scores(intent), budget_tokens)
+    print(f"🎯 Packed {len(selected)}/{len(passages)} passages (~{budget_tokens} token budget) for the intent")
+    return "\n".join(selected)
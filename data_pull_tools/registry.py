@@ -0,0 +1,70 @@
+# registry.py
+# Tools by name, imported on first use. Each backend pulls in heavy
+# dependencies (Selenium, yt_dlp, youtubesearchpython, rapidfuzz,
+# pydantic_ai), so nothing here imports them until a tool is requested.
+# Entry points call load_env() once instead of modules calling
+# load_dotenv() as an import side effect.
+
+import sys
+import threading
+from importlib import import_module
+from typing import Any, Dict, List, Optional, Tuple
+
+# tool name -> (module inside data_pull_tools, attribute)
+TOOLS: Dict[str, Tuple[str, str]] = {
+    "scrape_company_website": ("website_scraper_tool", "scrape_company_website"),
+    "hn_scrape_tool": ("hacker_news_tool", "hn_scrape_tool"),
+    "hn_bulk_scrape_tool": ("hacker_news_tool", "hn_bulk_scrape_tool"),
+    "generate_product_summary": ("youtube_scraper_tool", "generate_product_summary"),
+}
+
+_loaded: Dict[str, Any] = {}
+_lock = threading.Lock()
+_env_loaded = False
+
+
+def tool_names() -> List[str]:
+    return list(TOOLS)
+
+
+def is_loaded(name: str) -> bool:
+    return name in _loaded
+
+
+def get_tool(name: str) -> Any:
+    """Imports the tool's backend module on first use and returns the tool object."""
+    if name in _loaded:
+        return _loaded[name]
+    if name not in TOOLS:
+        raise KeyError(f"Unknown tool '{name}', expected one of {tool_names()}")
+    module_name, attribute = TOOLS[name]
+    with _lock:
+        if name not in _loaded:
+            module = import_module(f"{__package__}.{module_name}")
+            _loaded[name] = getattr(module, attribute)
+    return _loaded[name]
+
+
+def get_tools(names: Optional[List[str]] = None) -> List[Any]:
+    return [get_tool(name) for name in (names or tool_names())]
+
+
+async def close_clients() -> None:
+    """Closes the running loop's pooled httpx clients in every module that has been loaded."""
+    for module_name in ("llm_gateway", "page_fetcher", "hacker_news_tool"):
+        module = sys.modules.get(f"{__package__}.{module_name}")
+        if module is not None:
+            await module.close_clients()
+
+
+def load_env(path: Optional[str] = None) -> None:
+    """Loads .env into os.environ once; call it before importing modules that read config at import time."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv(path)
+    _env_loaded = True
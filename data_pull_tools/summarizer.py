@@ -0,0 +1,177 @@
+# summarizer.py
+# Token-aware hierarchical map-reduce summarization on top of the LLM
+# gateway. Text is chunked on sentence boundaries to fit the model context,
+# chunks are summarized concurrently (the gateway bounds parallelism), and
+# partial summaries are merged in a tree with bounded fan-in so the final
+# prompt never overflows the context window.
+
+import os
+import re
+import asyncio
+from typing import Dict, List, Optional
+
+from .llm_gateway import get_llm_gateway
+
+CONTEXT_TOKENS = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+OUTPUT_TOKENS = 1024
+OVERLAP_TOKENS = 64
+REDUCE_FAN_IN = 4
+MAX_REDUCE_ROUNDS = 8
+CHARS_PER_TOKEN = 4  # rough average for English text with Llama tokenizers
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+
+def _split_long_sentence(sentence: str, max_tokens: int) -> List[str]:
+    words = sentence.split()
+    pieces, current, size = [], [], 0
+    for word in words:
+        cost = estimate_tokens(word) + 1
+        if current and size + cost > max_tokens:
+            pieces.append(" ".join(current))
+            current, size = [], 0
+        current.append(word)
+        size += cost
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keeps whole leading sentences up to max_tokens; cuts characters only if the first sentence is too long."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept: List[str] = []
+    size = 0
+    for sentence in split_sentences(text):
+        cost = estimate_tokens(sentence) + 1
+        if size + cost > max_tokens:
+            break
+        kept.append(sentence)
+        size += cost
+    return " ".join(kept) if kept else text[:max_tokens * CHARS_PER_TOKEN]
+
+
+def chunk_by_tokens(text: str, max_tokens: int, overlap_tokens: int = OVERLAP_TOKENS) -> List[str]:
+    """Greedy sentence packing; each new chunk repeats trailing sentences of the previous one up to overlap_tokens."""
+    sentences: List[str] = []
+    for sentence in split_sentences(text):
+        if estimate_tokens(sentence) > max_tokens:
+            sentences.extend(_split_long_sentence(sentence, max_tokens))
+        else:
+            sentences.append(sentence)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for sentence in sentences:
+        cost = estimate_tokens(sentence) + 1
+        if current and size + cost > max_tokens:
+            chunks.append(" ".join(current))
+            overlap: List[str] = []
+            overlap_size = 0
+            for prev in reversed(current):
+                prev_cost = estimate_tokens(prev) + 1
+                if overlap_size + prev_cost > overlap_tokens or overlap_size + prev_cost + cost > max_tokens:
+                    break
+                overlap.insert(0, prev)
+                overlap_size += prev_cost
+            current, size = overlap, overlap_size
+        current.append(sentence)
+        size += cost
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class MapReduceSummarizer:
+    """Summarizes arbitrarily long text with prompts that contain a '{text}' placeholder."""
+
+    def __init__(self, map_template: str, reduce_template: Optional[str] = None, system: Optional[str] = None,
+                 context_tokens: int = CONTEXT_TOKENS, output_tokens: int = OUTPUT_TOKENS,
+                 overlap_tokens: int = OVERLAP_TOKENS, fan_in: int = REDUCE_FAN_IN):
+        self.map_template = map_template
+        self.reduce_template = reduce_template or map_template
+        self.system = system
+        self.context_tokens = context_tokens
+        self.output_tokens = output_tokens
+        self.overlap_tokens = overlap_tokens
+        self.fan_in = max(2, fan_in)
+
+        overhead = max(estimate_tokens(self.map_template), estimate_tokens(self.reduce_template))
+        if system:
+            overhead += estimate_tokens(system)
+        self.chunk_tokens = max(256, context_tokens - output_tokens - overhead)
+
+    def _messages(self, template: str, text: str) -> List[Dict]:
+        messages = []
+        if self.system:
+            messages.append({"role": "system", "content": self.system})
+        messages.append({"role": "user", "content": template.replace("{text}", text)})
+        return messages
+
+    async def _call(self, template: str, text: str) -> str:
+        try:
+            return await get_llm_gateway().chat_text(
+                self._messages(template, text),
+                options={"num_ctx": self.context_tokens, "num_predict": self.output_tokens}
+            )
+        except Exception as e:
+            print("⚠️ Ollama summary error:", e)
+            return ""
+
+    def _group(self, parts: List[str]) -> List[List[str]]:
+        """Groups of 2..fan_in parts that fit chunk_tokens; parts are capped at half the budget so two always fit."""
+        parts = [truncate_to_tokens(part, self.chunk_tokens // 2 - 2) for part in parts]
+        groups: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        for part in parts:
+            cost = estimate_tokens(part) + 2
+            if len(current) >= 2 and (len(current) >= self.fan_in or size + cost > self.chunk_tokens):
+                groups.append(current)
+                current, size = [], 0
+            current.append(part)
+            size += cost
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _reduce_group(self, group: List[str]) -> str:
+        if len(group) == 1:
+            return group[0]
+        return await self._call(self.reduce_template, "\n\n".join(group))
+
+    async def summarize(self, text: str) -> str:
+        chunks = chunk_by_tokens(text, self.chunk_tokens, self.overlap_tokens)
+        if not chunks:
+            return ""
+
+        parts = await asyncio.gather(*(self._call(self.map_template, chunk) for chunk in chunks))
+        parts = [p for p in parts if p]
+        if len(chunks) == 1:
+            return parts[0] if parts else ""
+
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if len(parts) <= 1:
+                break
+            groups = self._group(parts)
+            if len(groups) == 1:
+                return await self._call(self.reduce_template, "\n\n".join(groups[0]))
+            reduced = [p for p in await asyncio.gather(*(self._reduce_group(g) for g in groups)) if p]
+            if len(reduced) >= len(parts):
+                break
+            parts = reduced
+        if len(parts) > 1:
+            # Out of rounds: one last reduce over whatever fits in the budget
+            print(f"⚠️ Reduce stopped with {len(parts)} partial summaries; merging what fits")
+            return await self._call(self.reduce_template, truncate_to_tokens("\n\n".join(parts), self.chunk_tokens))
+        return parts[0] if parts else ""
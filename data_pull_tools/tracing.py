@@ -0,0 +1,254 @@
+# tracing.py
+# Lightweight per-run instrumentation: nested span timings, counters and
+# histograms, exported as a JSON trace plus Prometheus text format. Turned
+# on with SUPERVISOR_TRACE=1; when off, every entry point returns after a
+# single flag check and span() hands back a shared no-op object.
+
+import os
+import json
+import time
+import itertools
+import threading
+import contextvars
+from typing import Dict, List, Optional, Tuple
+
+TRACE_ENABLED = os.getenv("SUPERVISOR_TRACE", "").lower() in ("1", "true", "yes")
+TRACE_MAX_SPANS = int(os.getenv("SUPERVISOR_TRACE_MAX_SPANS", "100000"))
+METRIC_PREFIX = "supervisor_"
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times one stage; nests under whichever span is current in this task or thread."""
+
+    __slots__ = ("tracer", "name", "attrs", "id", "parent", "start", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = next(tracer._ids)
+        self.parent = None
+        self.start = 0.0
+        self._token = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self.id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._finish(self, duration)
+        return False
+
+
+class Tracer:
+    def __init__(self, max_spans: int = TRACE_MAX_SPANS):
+        self.max_spans = max_spans
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.spans: List[Dict] = []
+        self.dropped_spans = 0
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List] = {}
+
+    def span(self, name: str, **attrs) -> Span:
+        return Span(self, name, attrs)
+
+    def _finish(self, span: Span, duration: float) -> None:
+        record = {
+            "id": span.id,
+            "parent": span.parent,
+            "name": span.name,
+            "start": round(span.start - self._origin, 6),
+            "duration": round(duration, 6),
+            "attrs": span.attrs,
+        }
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(record)
+            else:
+                self.dropped_spans += 1
+        self.observe("span_seconds", duration, span=span.name)
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(HISTOGRAM_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def cache_hit_ratios(self) -> Dict[str, float]:
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            for (name, labels), value in self.counters.items():
+                if name != "cache_requests_total":
+                    continue
+                label = dict(labels)
+                hits_total = totals.setdefault(label.get("cache", ""), [0.0, 0.0])
+                hits_total[1] += value
+                if label.get("result") == "hit":
+                    hits_total[0] += value
+        return {cache: round(hits / total, 4) if total else 0.0 for cache, (hits, total) in totals.items()}
+
+    def to_json(self) -> Dict:
+        with self._lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self.counters.items()]
+            histograms = [
+                {"name": n, "labels": dict(l), "count": h[2], "sum": round(h[1], 6),
+                 "buckets": dict(zip(map(str, HISTOGRAM_BUCKETS), h[0]))}
+                for (n, l), h in self.histograms.items()
+            ]
+            spans = list(self.spans)
+        return {
+            "started_at": self.started_at,
+            "elapsed": round(time.perf_counter() - self._origin, 6),
+            "cache_hit_ratio": self.cache_hit_ratios(),
+            "counters": counters,
+            "histograms": histograms,
+            "spans": spans,
+            "dropped_spans": self.dropped_spans,
+        }
+
+    def to_prometheus(self) -> str:
+        def fmt(labels: Labels, extra: Tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+
+        typed = set()
+        for (name, labels), value in counters:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{fmt(labels)} {value:g}")
+
+        for (name, labels), (buckets, total, count) in histograms:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            for bound, bucket_count in zip(HISTOGRAM_BUCKETS, buckets):
+                lines.append(f"{metric}_bucket{fmt(labels, (('le', f'{bound:g}'),))} {bucket_count}")
+            lines.append(f"{metric}_bucket{fmt(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{metric}_sum{fmt(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# ----------------------------
+# Module-level API (no-op unless SUPERVISOR_TRACE is set)
+# ----------------------------
+_tracer: Optional[Tracer] = Tracer() if TRACE_ENABLED else None
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, **attrs):
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.span(name, **attrs)
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    if _tracer is not None:
+        _tracer.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    if _tracer is not None:
+        _tracer.observe(name, value, **labels)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    if _tracer is not None:
+        _tracer.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def queue_wait(queue: str, since: float) -> None:
+    """Records time spent waiting for a slot; `since` is a time.perf_counter() value."""
+    if _tracer is not None:
+        _tracer.observe("queue_wait_seconds", time.perf_counter() - since, queue=queue)
+
+
+def record_ollama(result: Dict, endpoint: str = "chat") -> None:
+    """Counts Ollama's own timing fields from a final (done) response."""
+    if _tracer is None or not result:
+        return
+    model = result.get("model", "")
+    _tracer.inc("ollama_requests_total", endpoint=endpoint, model=model)
+    _tracer.inc("ollama_eval_tokens_total", result.get("eval_count") or 0, model=model)
+    _tracer.inc("ollama_prompt_tokens_total", result.get("prompt_eval_count") or 0, model=model)
+    # Ollama reports durations in nanoseconds
+    for field in ("eval_duration", "prompt_eval_duration", "load_duration", "total_duration"):
+        if result.get(field):
+            _tracer.observe(f"ollama_{field.replace('_duration', '')}_seconds", result[field] / 1e9, model=model)
+
+
+def export_trace(directory: str, name: str = "trace") -> Optional[Tuple[str, str]]:
+    """Writes <name>.json and <name>.prom into directory; returns their paths, or None when tracing is off."""
+    if _tracer is None:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    json_path = os.path.join(directory, f"{name}.json")
+    prom_path = os.path.join(directory, f"{name}.prom")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(_tracer.to_json(), f, indent=2, ensure_ascii=False)
+    with open(prom_path, "w", encoding="utf-8") as f:
+        f.write(_tracer.to_prometheus())
+    print(f"📈 Trace written to {json_path} and {prom_path}")
+    return json_path, prom_path
@@ -1,33 +1,29 @@
-import os
-os.environ["OLLAMA_HOST"] = "http://localhost:11434"
-
-import json
 import asyncio
 import httpx
 from typing import List
-from urllib.parse import urlparse, urljoin
-from collections import deque
-from dotenv import load_dotenv
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
+
 from pydantic import BaseModel, HttpUrl
 from pydantic_ai import Tool
 
-load_dotenv()
+from . import tracing
+from .driver_pool import get_driver_pool
+from .page_fetcher import FETCH_MODES, get_http_client, fetch_static_page
+from .crawler import AsyncCrawler
+from .frontier import SITEMAP_ENABLED, discover_site
+from .page_cache import CachedPage, get_page_cache, conditional_headers, content_digest
+from .summarizer import MapReduceSummarizer
+from .dedup import dedupe_pages
+from .passage_ranker import select_context
 
 # ----------------------------
 # Pydantic Models
 # ----------------------------
 class ScraperInput(BaseModel):
     url: HttpUrl
-    max_pages: int = 5
+    max_pages: int = 4  # the frontier visits the most useful pages first, so fewer are needed
+    fetch_mode: str = "auto"  # 'auto' (HTTP first, browser fallback), 'http' or 'browser'
+    intent: str = ""  # user's chat text; when set, only the most relevant passages are summarized
 
 class ScraperOutput(BaseModel):
     text_content: str
@@ -39,17 +35,56 @@ class WebsiteContent(BaseModel):
     company_name: str
     text_content: List[str]
     links: List[str]
+    fetched_via: str = "browser"  # 'http', 'browser' or 'cache'
+
+# ----------------------------
+# In-page DOM snapshot
+# ----------------------------
+# Collects the visible text of every element under <main> (or <body>) and all
+# absolute links in a single WebDriver round trip.
+DOM_SNAPSHOT_JS = """
+const container = document.querySelector("main") || document.body;
+const isVisible = (el) => {
+    if (!el.getClientRects().length) return false;
+    const style = window.getComputedStyle(el);
+    return style.visibility !== "hidden" && style.display !== "none" && style.opacity !== "0";
+};
+
+const texts = [];
+const seenTexts = new Set();
+if (container) {
+    for (const el of container.querySelectorAll("*")) {
+        if (!isVisible(el)) continue;
+        const text = (el.innerText || "").trim();
+        if (text && !seenTexts.has(text)) {
+            seenTexts.add(text);
+            texts.push(text);
+        }
+    }
+}
+
+const links = [];
+const seenLinks = new Set();
+for (const a of document.querySelectorAll("a[href]")) {
+    const href = a.href;
+    if (href && href.startsWith("http") && !seenLinks.has(href)) {
+        seenLinks.add(href);
+        links.push(href);
+    }
+}
+return {texts: texts, links: links};
+"""
 
 # ----------------------------
 # Scraper Logic
 # ----------------------------
 class CompanyWebsiteScraper:
-    def __init__(self):
-        self.options = Options()
-        self.options.add_argument("--headless")
-        self.options.add_argument("--no-sandbox")
-        self.options.add_argument("--disable-dev-shm-usage")
-        self.options.add_argument("--log-level=3")
+    def __init__(self, fetch_mode: str = "auto"):
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch_mode '{fetch_mode}', expected one of {FETCH_MODES}")
+        self.fetch_mode = fetch_mode
+        self.driver_pool = get_driver_pool()
+        self.page_cache = get_page_cache()
 
     def _extract_domain_as_company(self, url: str) -> str:
         hostname = urlparse(url).hostname or ""
@@ -57,83 +92,102 @@ class CompanyWebsiteScraper:
         return parts[0] if parts else "unknown"
 
     def extract_website_content(self, url: str) -> WebsiteContent:
-        driver = webdriver.Chrome(service=Service(), options=self.options)
-        driver.get(url)
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-
-        try:
-            container = driver.find_element(By.TAG_NAME, "main")
-        except:
-            container = driver.find_element(By.TAG_NAME, "body")
-
-        all_elements = container.find_elements(By.XPATH, ".//*")
-        unique_texts = set()
-        visible_texts = []
-
-        for elem in all_elements:
-          try:
-            if elem.is_displayed():
-               text = elem.text.strip()
-               if text and text not in unique_texts:
-                  visible_texts.append(text)
-                  unique_texts.add(text)
-          except:
-            continue
-
-        all_links = driver.find_elements(By.TAG_NAME, 'a')
-        links = {
-            a.get_attribute('href')
-            for a in all_links
-            if a.get_attribute('href') and a.get_attribute('href').startswith("http")
-        }
+        # Selenium is only imported once a page actually needs a browser
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
 
-        driver.quit()
+        with self.driver_pool.lease() as driver:
+            with tracing.span("chrome.page_load", url=url):
+                driver.get(url)
+                WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            with tracing.span("chrome.dom_snapshot"):
+                snapshot = driver.execute_script(DOM_SNAPSHOT_JS) or {}
 
         return WebsiteContent(
             url=url,
             company_name=self._extract_domain_as_company(url),
-            text_content=visible_texts,
-            links=list(links)
+            text_content=snapshot.get("texts", []),
+            links=snapshot.get("links", [])
         )
 
-    def crawl_website(self, base_url: str, max_pages: int = 5) -> List[WebsiteContent]:
-        visited = set()
-        to_visit = deque([base_url])
-        scraped_data = []
+    def _from_cache(self, entry: CachedPage) -> WebsiteContent:
+        content = WebsiteContent(**entry.content)
+        content.fetched_via = "cache"
+        return content
 
-        while to_visit and len(visited) < max_pages:
-            current_url = to_visit.popleft()
-            if current_url in visited:
-                continue
+    async def fetch_page(self, url: str, client: httpx.AsyncClient) -> WebsiteContent:
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if cached and self.page_cache.is_fresh(cached):
+            tracing.cache_lookup("page", True)
+            return self._from_cache(cached)
 
+        page = None
+        if self.fetch_mode != "browser" or cached:
             try:
-                print(f"🌐 Scraping: {current_url}")
-                content = self.extract_website_content(current_url)
-                scraped_data.append(content)
-                visited.add(current_url)
-
-                base_domain = urlparse(base_url).netloc
-                for link in content.links:
-                    if not link:
-                        continue
-                    parsed = urlparse(link)
-                    full_url = link if parsed.netloc else urljoin(base_url, link)
-                    if urlparse(full_url).netloc == base_domain and full_url not in visited:
-                        to_visit.append(full_url)
+                with tracing.span("http.fetch", url=url):
+                    page = await fetch_static_page(client, url, headers=conditional_headers(cached))
+            except Exception as e:
+                if self.fetch_mode == "http":
+                    if cached:
+                        print(f"⚠️ HTTP fetch failed for {url}, serving the stale cached copy: {e}")
+                        return self._from_cache(cached)
+                    raise
+                print(f"⚠️ HTTP fetch failed for {url}, falling back to browser: {e}")
 
+        # Unchanged since the cached copy: skip extraction and rendering
+        if cached and page and (page.not_modified or (page.content_hash and page.content_hash == cached.content_hash)):
+            self.page_cache.touch(url, page.etag, page.last_modified)
+            tracing.cache_lookup("page", True)
+            return self._from_cache(cached)
+        if self.page_cache:
+            tracing.cache_lookup("page", False)
+
+        if page and self.fetch_mode != "browser" and (not page.needs_browser or self.fetch_mode == "http"):
+            content = WebsiteContent(
+                url=url,
+                company_name=self._extract_domain_as_company(url),
+                text_content=page.text_blocks,
+                links=page.links,
+                fetched_via="http"
+            )
+        else:
+            try:
+                with tracing.span("website.browser_fetch", url=url):
+                    content = await asyncio.to_thread(self.extract_website_content, url)
             except Exception as e:
-                print(f"❌ Error scraping {current_url}: {e}")
-                continue
+                # A stale copy beats no page at all
+                if not cached:
+                    raise
+                print(f"⚠️ Browser fetch failed for {url}, serving the stale cached copy: {e}")
+                return self._from_cache(cached)
+        tracing.inc("pages_fetched_total", via=content.fetched_via)
+
+        if self.page_cache:
+            self.page_cache.put(
+                url,
+                content.model_dump(),
+                content_hash=page.content_hash if page else None,
+                etag=page.etag if page else None,
+                last_modified=page.last_modified if page else None
+            )
+        return content
 
-        return scraped_data
+    async def crawl_website(self, base_url: str, max_pages: int = 5) -> List[WebsiteContent]:
+        client = get_http_client()
+        crawler = AsyncCrawler(
+            lambda url: self.fetch_page(url, client),
+            max_pages=max_pages,
+            discover=(lambda url: discover_site(client, url)) if SITEMAP_ENABLED else None
+        )
+        return await crawler.crawl(base_url)
 
 # ----------------------------
-# Ollama Summary Helper (via HTTP)
+# Ollama Summary Helper (map-reduce summarizer)
 # ----------------------------
-def summarize_texts_ollama(scraped_data: List[WebsiteContent]) -> str:
-    combined_text = "\n".join(" ".join(page.text_content) for page in scraped_data)[:12000]
+SUMMARY_FAILED = "Summary generation failed."
 
-    prompt = f"""
+WEBSITE_SUMMARY_PROMPT = """
 You are a company analyst. Carefully analyze the extracted content from a company’s website and write a clear, multi-line summary including:
 
 1. What the company does and its target market
@@ -145,33 +199,56 @@ Ensure the summary is at least 5-7 lines long and coherent.
 Avoid bullets. Just write a structured paragraph.
 
 Text:
-{combined_text}
+{text}
 """
 
-    try:
-        response = httpx.post(
-            "http://localhost:11434/api/chat",
-            json={
-                "model": "llama3",
-                "messages": [{"role": "user", "content": prompt}]
-            },
-            timeout=60
-        )
-        result = response.json()
-        return result["message"]["content"].strip()
-    except Exception as e:
-        print("⚠️ Ollama HTTP error:", e)
-        return "Summary generation failed."
+WEBSITE_REDUCE_PROMPT = """
+You are a company analyst. The notes below are partial summaries of different parts of one company’s website.
+Merge them into a single clear, multi-line summary covering what the company does and its target market,
+its key products or services, its values, sustainability, certifications or mission, and notable distribution,
+partnership or innovation details.
+
+Ensure the summary is at least 5-7 lines long and coherent.
+Avoid bullets. Just write a structured paragraph.
+
+Notes:
+{text}
+"""
+
+async def summarize_texts_ollama(scraped_data: List[WebsiteContent], intent: str = "") -> str:
+    # Nav, footers, banners and repeated cards appear on every page; keep one copy
+    pages, stats = dedupe_pages([page.text_content for page in scraped_data])
+    if stats.blocks_in:
+        print(f"🧹 Dedup kept {stats.blocks_out}/{stats.blocks_in} blocks, "
+              f"saved {stats.bytes_saved} bytes (~{stats.tokens_saved} tokens)")
+        tracing.inc("dedup_bytes_saved_total", stats.bytes_saved)
+        tracing.inc("dedup_tokens_saved_total", stats.tokens_saved)
+    combined_text = "\n".join(block for blocks in pages for block in blocks)
+    combined_text = select_context(combined_text, intent)
+    engine = MapReduceSummarizer(map_template=WEBSITE_SUMMARY_PROMPT, reduce_template=WEBSITE_REDUCE_PROMPT)
+    summary = await engine.summarize(combined_text)
+    return summary or SUMMARY_FAILED
 
 # ----------------------------
 # Tool Entrypoint
 # ----------------------------
-@Tool
-async def scrape_company_website(input_data: ScraperInput) -> ScraperOutput:
-    """Scrapes a company's website and returns a structured summary with links."""
-    scraper = CompanyWebsiteScraper()
-    pages = scraper.crawl_website(str(input_data.url), input_data.max_pages)
-    summary = summarize_texts_ollama(pages)
+# ✅ Raw logic exposed for the orchestrator and testing/debugging
+async def scrape_website_logic(input_data: ScraperInput) -> ScraperOutput:
+    scraper = CompanyWebsiteScraper(fetch_mode=input_data.fetch_mode)
+    pages = await scraper.crawl_website(str(input_data.url), input_data.max_pages)
+
+    # Reuse the last summary when the crawled text (and the intent it was packed for) has not changed
+    page_cache = get_page_cache()
+    blocks = [block for p in pages for block in p.text_content]
+    digest = content_digest(blocks + [f"intent:{input_data.intent}"] if input_data.intent else blocks)
+    summary = page_cache.get_summary(digest) if page_cache and pages else None
+    if page_cache and pages:
+        tracing.cache_lookup("website_summary", summary is not None)
+    if summary is None:
+        with tracing.span("website.summarize", pages=len(pages)):
+            summary = await summarize_texts_ollama(pages, input_data.intent)
+        if page_cache and pages and summary != SUMMARY_FAILED:
+            page_cache.put_summary(digest, summary)
 
     links: List[HttpUrl] = []
     for p in pages:
@@ -186,3 +263,9 @@ async def scrape_company_website(input_data: ScraperInput) -> ScraperOutput:
         links=links,
         summary_text=summary
     )
+
+# ✅ Tool-wrapped version used by the agent
+@Tool
+async def scrape_company_website(input_data: ScraperInput) -> ScraperOutput:
+    """Scrapes a company's website and returns a structured summary with links."""
+    return await scrape_website_logic(input_data)
@@ -1,33 +1,96 @@
-# Updated YouTube scraper to support both 'review' and 'demo/test' videos.
-# We'll default to 'review' in the test file.
+# youtube_scraper_tool.py
+# Finds 'review' or 'demo' videos for a product, pulls their English caption
+# tracks (metadata and VTT in one yt_dlp session per video, on a shared thread
+# pool), cleans the cues into transcripts cached as JSON, and summarizes them.
 
 import os
 import re
 import json
 import asyncio
-import httpx
-from typing import List
-from urllib.parse import urlparse
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 from pydantic import BaseModel
 from pydantic_ai import Tool
 from youtubesearchpython import VideosSearch
 import yt_dlp
 
-OLLAMA_HOST = "http://localhost:11434"
-CHUNK_SIZE = 1000
+from . import tracing
+from .llm_gateway import get_llm_gateway
+from .summarizer import MapReduceSummarizer
+from .passage_ranker import select_context
+
+SENTIMENT_SYSTEM_PROMPT = "You are a market researcher specializing in product sentiment."
+CLEAN_MODES = ("dedup", "llm")
+VTT_CUE_TIMING = re.compile(r"((?:\d+:)?\d{2}:\d{2}[.,]\d{3})\s*-->\s*((?:\d+:)?\d{2}:\d{2}[.,]\d{3})")
+TRANSITION_CUE_SECONDS = 0.05  # YouTube's rolling captions emit ~10ms cues that only repeat the previous line
+MAX_OVERLAP_WORDS = 64
+MIN_OVERLAP_WORDS = 2  # shorter overlaps are only stripped when they repeat the whole line
+# Per-word timing tags only appear in auto-generated (rolling) captions, never in uploaded subtitles
+ROLLING_CAPTION_TAG = re.compile(r"<(?:\d+:)?\d{2}:\d{2}[.,]\d{3}><c>")
+SUBTITLE_WORKERS = int(os.getenv("YT_SUBTITLE_WORKERS", "6"))
 
 class ProductInput(BaseModel):
     product_name: str
     focus: str = "review"  # Can be 'review' or 'demo'
+    clean_mode: str = "dedup"  # 'dedup' (algorithmic) or 'llm' (Ollama clean pass)
+    intent: str = ""  # user's chat text; when set, only the most relevant passages are summarized
+
+class SubtitleFetcher:
+    """Reads title and caption track from one metadata extraction and downloads the VTT into memory."""
+
+    def __init__(self, max_workers=SUBTITLE_WORKERS, lang="en"):
+        self.lang = lang
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yt-subtitles")
+
+    def _pick_track(self, info) -> Optional[str]:
+        # Prefer uploaded subtitles over auto-generated captions
+        for source in ("subtitles", "automatic_captions"):
+            tracks = info.get(source) or {}
+            langs = [l for l in tracks if l == self.lang] + [l for l in tracks if l.startswith(f"{self.lang}-")]
+            for lang in langs:
+                for track in tracks[lang]:
+                    if track.get("ext") == "vtt" and track.get("url"):
+                        return track["url"]
+        return None
+
+    def fetch_sync(self, video_url, skip: Optional[Callable[[str], bool]] = None) -> Tuple[str, Optional[str]]:
+        """Returns (title, VTT text); the VTT is not downloaded when skip(title) is true (already cached)."""
+        with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True, 'skip_download': True}) as ydl:
+            with tracing.span("yt_dlp.extract_info", url=video_url):
+                info = ydl.extract_info(video_url, download=False)
+            title = info.get('title', 'video')
+            if skip and skip(title):
+                return title, None
+            track_url = self._pick_track(info)
+            with tracing.span("yt_dlp.subtitles", found=bool(track_url)):
+                vtt = ydl.urlopen(track_url).read().decode("utf-8", errors="replace") if track_url else None
+        return title, vtt
+
+    async def fetch(self, video_url, skip: Optional[Callable[[str], bool]] = None) -> Tuple[str, Optional[str]]:
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context so yt_dlp spans nest under the tool span
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, context.run, self.fetch_sync, video_url, skip)
 
-class YTDLogger:
-    def __init__(self, log_file): self.log_file = log_file
-    def debug(self, msg): self._write(msg)
-    def warning(self, msg): self._write(msg)
-    def error(self, msg): self._write(msg)
-    def _write(self, msg): open(self.log_file, 'a', encoding='utf-8').write(msg + '\n')
+_subtitle_fetcher: Optional[SubtitleFetcher] = None
+_subtitle_fetcher_lock = threading.Lock()
+
+def get_subtitle_fetcher() -> SubtitleFetcher:
+    global _subtitle_fetcher
+    with _subtitle_fetcher_lock:
+        if _subtitle_fetcher is None:
+            _subtitle_fetcher = SubtitleFetcher()
+        return _subtitle_fetcher
 
 class VideoProcessor:
+    def __init__(self, clean_mode="dedup"):
+        if clean_mode not in CLEAN_MODES:
+            raise ValueError(f"Unknown clean_mode '{clean_mode}', expected one of {CLEAN_MODES}")
+        self.clean_mode = clean_mode
+        self.subtitles = get_subtitle_fetcher()
+
     @staticmethod
     def sanitize(name): return re.sub(r'[\\/*?:"<>|]', "", name).strip()
 
@@ -40,6 +103,72 @@ class VideoProcessor:
             if line.strip() and '-->' not in line and not line.startswith(('WEBVTT', 'Kind:', 'Language:')) and '[Music]' not in line
         )
 
+    @staticmethod
+    def _vtt_seconds(stamp):
+        parts = stamp.replace(',', '.').split(':')
+        seconds = float(parts[-1]) + int(parts[-2]) * 60
+        return seconds + (int(parts[-3]) * 3600 if len(parts) == 3 else 0)
+
+    @staticmethod
+    def parse_vtt_cues(vtt):
+        """Returns (start, end, text_lines) per cue, with tags and headers stripped like extract_text_from_vtt."""
+        cues = []
+        current = None
+        for line in vtt.splitlines():
+            timing = VTT_CUE_TIMING.search(line)
+            if timing:
+                current = (VideoProcessor._vtt_seconds(timing.group(1)), VideoProcessor._vtt_seconds(timing.group(2)), [])
+                cues.append(current)
+                continue
+            if current is None or not line.strip():
+                continue
+            text = VideoProcessor.extract_text_from_vtt(line)
+            if text:
+                current[2].append(text)
+        return cues
+
+    @staticmethod
+    def _overlap(tail, words):
+        # Longest k such that the last k emitted words equal the first k new words; a one-word
+        # overlap ("very" / "very good") is usually real speech unless it is the whole line
+        limit = min(len(tail), len(words), MAX_OVERLAP_WORDS)
+        for k in range(limit, 0, -1):
+            if tail[-k:] == words[:k]:
+                return k if k >= MIN_OVERLAP_WORDS or k == len(words) else 0
+        return 0
+
+    @staticmethod
+    def dedupe_vtt(vtt, rolling=None):
+        """Collapses rolling auto-caption duplicates without an LLM call.
+
+        Overlap stripping only runs on rolling captions (detected from their word-timing tags
+        unless `rolling` is given); uploaded subtitles don't repeat lines, so words that recur
+        across their cues ("very / very good") are real speech and kept.
+        """
+        if rolling is None:
+            rolling = bool(ROLLING_CAPTION_TAG.search(vtt))
+        cues = sorted(VideoProcessor.parse_vtt_cues(vtt), key=lambda cue: cue[0])
+        emitted = []
+        lines = []
+        for start, end, cue_lines in cues:
+            if end - start < TRANSITION_CUE_SECONDS:
+                continue
+            added = []
+            for line in cue_lines:
+                words = line.split()
+                normalized = [w.lower() for w in words]
+                skip = VideoProcessor._overlap(emitted[-MAX_OVERLAP_WORDS:], normalized) if rolling else 0
+                emitted.extend(normalized[skip:])
+                added.extend(words[skip:])
+            if added:
+                lines.append(" ".join(added))
+        return "\n".join(lines)
+
+    async def clean_transcript(self, raw_vtt):
+        if self.clean_mode == "llm":
+            return await clean_text_with_ollama(self.extract_text_from_vtt(raw_vtt))
+        return self.dedupe_vtt(raw_vtt)
+
     def get_video_urls(self, query, focus, max_results=10):
         # Add "review" or "demo/test" flavor
         if focus == "review":
@@ -58,37 +187,18 @@ class VideoProcessor:
     async def download_and_clean(self, video_url, output_dir):
         os.makedirs(output_dir, exist_ok=True)
         try:
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                info = ydl.extract_info(video_url, download=False)
-                title = self.sanitize(info.get('title', 'video'))
-                base_path = os.path.join(output_dir, title)
-                vtt_file = f"{base_path}.en.vtt"
-                json_file = f"{base_path}.json"
-                log_file = f"{base_path}.log"
+            def transcript_path(raw_title):
+                return os.path.join(output_dir, f"{self.sanitize(raw_title)}.json")
+
+            # Cached transcripts are detected right after the metadata call, before any subtitle download
+            raw_title, raw = await self.subtitles.fetch(video_url, skip=lambda t: os.path.exists(transcript_path(t)))
+            title = self.sanitize(raw_title)
+            json_file = transcript_path(raw_title)
 
             if os.path.exists(json_file):
                 return
 
-            ydl_opts = {
-                'quiet': True,
-                'writesubtitles': True,
-                'writeautomaticsub': True,
-                'skip_download': True,
-                'subtitleslangs': ['en'],
-                'subtitlesformat': 'vtt',
-                'outtmpl': base_path + '.%(ext)s',
-                'logger': YTDLogger(log_file)
-            }
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-
-            if os.path.exists(vtt_file):
-                with open(vtt_file, 'r', encoding='utf-8') as f:
-                    raw = f.read()
-                cleaned = await clean_text_with_ollama(self.extract_text_from_vtt(raw))
-            else:
-                cleaned = ""
+            cleaned = await self.clean_transcript(raw) if raw else ""
 
             with open(json_file, 'w', encoding='utf-8') as jf:
                 json.dump({
@@ -97,17 +207,14 @@ class VideoProcessor:
                     "transcript": cleaned
                 }, jf, indent=2, ensure_ascii=False)
 
-            for f in [vtt_file, log_file]:
-                if os.path.exists(f):
-                    os.remove(f)
-
         except Exception as e:
             print(f"❌ Download failed: {e}")
 
 class TranscriptSummarizer:
-    def __init__(self, transcript_dir, product_name):
+    def __init__(self, transcript_dir, product_name, intent=""):
         self.dir = transcript_dir
         self.product = product_name.lower()
+        self.intent = intent
 
     def _load_transcripts(self):
         texts = []
@@ -120,42 +227,29 @@ class TranscriptSummarizer:
                         texts.append(transcript.strip())
         return "\n\n".join(texts)
 
-    def _chunk_text(self, text):
-        return [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
-
-    async def _summarize_chunk(self, text):
-        prompt = (
-            f"Summarize the following transcript ONLY focusing on reviews and customer opinions about '{self.product}'. "
-            "Extract key feedback, pros, cons, and general sentiment. Ignore unrelated content.\n\n"
-            f"{text}"
+    def _build_engine(self):
+        return MapReduceSummarizer(
+            map_template=(
+                f"Summarize the following transcript ONLY focusing on reviews and customer opinions about '{self.product}'. "
+                "Extract key feedback, pros, cons, and general sentiment. Ignore unrelated content.\n\n"
+                "{text}"
+            ),
+            reduce_template=(
+                f"Combine the following partial summaries of customer opinions about '{self.product}' into one summary. "
+                "Keep key feedback, pros, cons, and general sentiment. Drop repetition.\n\n"
+                "{text}"
+            ),
+            system=SENTIMENT_SYSTEM_PROMPT
         )
-        try:
-            response = httpx.post(
-                f"{OLLAMA_HOST}/api/chat",
-                json={
-                    "model": "llama3",
-                    "stream": False,
-                    "messages": [
-                        {"role": "system", "content": "You are a market researcher specializing in product sentiment."},
-                        {"role": "user", "content": prompt}
-                    ]
-                },
-                timeout=None
-            )
-            return response.json()["message"]["content"].strip()
-        except Exception as e:
-            print("⚠️ Ollama summary error:", e)
-            return ""
 
     async def summarize(self):
         text = self._load_transcripts()
         if not text:
             return {"summary": "No usable transcripts found."}
 
-        chunks = self._chunk_text(text)
-        partials = await asyncio.gather(*[self._summarize_chunk(chunk) for chunk in chunks if chunk.strip()])
-        combined = "\n\n".join(partials)
-        final = await self._summarize_chunk(combined)
+        if self.intent:
+            text = select_context(text, f"{self.product} {self.intent}")
+        final = await self._build_engine().summarize(text)
 
         output_path = os.path.join(self.dir, "combined_summary.json")
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -168,32 +262,26 @@ class TranscriptSummarizer:
 async def clean_text_with_ollama(raw_text: str) -> str:
     prompt = f"Clean this text by removing repeated or overlapping phrases. Keep only meaningful content:\n\n{raw_text}"
     try:
-        response = httpx.post(
-            f"{OLLAMA_HOST}/api/chat",
-            json={
-                "model": "llama3",
-                "stream": False,
-                "messages": [{"role": "user", "content": prompt}]
-            },
-            timeout=None
-        )
-        return response.json()["message"]["content"].strip()
+        return await get_llm_gateway().chat_text([{"role": "user", "content": prompt}])
     except Exception as e:
         print("⚠️ Ollama clean-text error:", e)
         return raw_text
 
-async def run_video_processor(product_name: str, focus="review"):
-    processor = VideoProcessor()
+async def run_video_processor(product_name: str, focus="review", clean_mode="dedup", intent=""):
+    processor = VideoProcessor(clean_mode=clean_mode)
     base_dir = f"{VideoProcessor.sanitize(product_name)}_{focus}_captions"
     os.makedirs(base_dir, exist_ok=True)
 
-    urls = processor.get_video_urls(product_name, focus=focus, max_results=10)
-    await asyncio.gather(*(processor.download_and_clean(url, base_dir) for url in urls))
+    with tracing.span("youtube.search", product=product_name):
+        urls = await asyncio.to_thread(processor.get_video_urls, product_name, focus, 10)
+    with tracing.span("youtube.transcripts", videos=len(urls)):
+        await asyncio.gather(*(processor.download_and_clean(url, base_dir) for url in urls))
 
-    summarizer = TranscriptSummarizer(transcript_dir=base_dir, product_name=product_name)
-    return await summarizer.summarize()
+    summarizer = TranscriptSummarizer(transcript_dir=base_dir, product_name=product_name, intent=intent)
+    with tracing.span("youtube.summarize"):
+        return await summarizer.summarize()
 
 @Tool
 async def generate_product_summary(input: ProductInput):
     """Search YouTube for product demo/review videos, extract transcripts, and summarize key insights."""
-    return await run_video_processor(input.product_name, focus=input.focus)
+    return await run_video_processor(input.product_name, focus=input.focus, clean_mode=input.clean_mode, intent=input.intent)
@@ -1,15 +1,15 @@
-from bs4 import BeautifulSoup
+import sys
+import os
 from urllib.parse import urlparse
 from typing import List, Optional
 from pydantic import BaseModel, HttpUrl
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import re
+
+# ✅ Share the Chrome driver pool with data_pull_tools
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_pull_tools.driver_pool import get_driver_pool
+from data_pull_tools.page_cache import get_page_cache, content_digest
+# extract_body_content and clean_body_content are re-exported for callers that imported them from here
+from data_pull_tools.html_extract import extract_body_content, clean_body_content, parse_page_sync  # noqa: F401
 
 
 class WebsiteContent(BaseModel):
@@ -19,26 +19,10 @@ class WebsiteContent(BaseModel):
     links: List[HttpUrl]
 
 
-def extract_body_content(html_content: str) -> str:
-    soup = BeautifulSoup(html_content, "html.parser")
-    body = soup.body or soup
-    return str(body)
-
-
-def clean_body_content(body_content: str) -> str:
-    soup = BeautifulSoup(body_content, "html.parser")
-    for tag in soup(["script", "style"]):
-        tag.extract()
-    text = soup.get_text(separator="\n")
-    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
-
-
 class WebsiteExtractor:
     def __init__(self):
-        self.options = Options()
-        self.options.add_argument("--headless")
-        self.options.add_argument("--no-sandbox")
-        self.options.add_argument("--disable-dev-shm-usage")
+        self.driver_pool = get_driver_pool()
+        self.page_cache = get_page_cache()
 
     def _extract_domain_as_company(self, url: str) -> str:
         hostname = urlparse(url).hostname or ""
@@ -46,24 +30,39 @@ class WebsiteExtractor:
         return parts[0] if parts else "unknown"
 
     def extract(self, url: str) -> WebsiteContent:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=self.options)
-        driver.get(url)
-        print(f"\U0001F30D Loaded: {url}")
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if cached and (self.page_cache.is_fresh(cached) or self.page_cache.revalidate(cached)):
+            return WebsiteContent(**cached.content)
+
+        # Selenium is only imported once a page actually needs a browser
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
 
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        html = driver.page_source
-        driver.quit()
+        with self.driver_pool.lease() as driver:
+            driver.get(url)
+            print(f"\U0001F30D Loaded: {url}")
 
-        body = extract_body_content(html)
-        cleaned = clean_body_content(body)
-        text_blocks = cleaned.split("\n")
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            html = driver.page_source
 
-        soup = BeautifulSoup(html, "html.parser")
-        links = [a["href"] for a in soup.find_all("a", href=True) if a["href"].startswith("http")]
+        # One parse for text and links, in the shared process pool
+        text_blocks, links = parse_page_sync(html, url)
 
-        return WebsiteContent(
+        content = WebsiteContent(
             url=url,
             company_name=self._extract_domain_as_company(url),
             text_content=text_blocks,
             links=links
         )
+        if self.page_cache:
+            # The browser exposes no response headers, so ask the server for validators directly
+            etag, last_modified = self.page_cache.fetch_validators(url)
+            self.page_cache.put(
+                url,
+                content.model_dump(mode="json"),
+                content_hash=content_digest(text_blocks),
+                etag=etag,
+                last_modified=last_modified
+            )
+        return content
@@ -0,0 +1,190 @@
+import sys
+import os
+import json
+import asyncio
+import argparse
+from typing import Dict, Iterator, Optional, Set
+
+# ✅ Load .env before any module reads its config from the environment
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_pull_tools.registry import load_env, close_clients
+load_env()
+
+from utils import analyze_chat_and_scrape
+from orchestrator import ToolOrchestrator
+from company_index import get_company_index, PREFILTER_TOP_K
+from data_pull_tools.tracing import export_trace
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+READ_CHUNK_BYTES = 1 << 16
+WHITESPACE = " \t\r\n"
+
+
+# ------------------------------
+# STREAMING INPUT
+# ------------------------------
+def iter_json_array(path: str, chunk_size: int = READ_CHUNK_BYTES) -> Iterator:
+    """Yields the items of a top-level JSON array one at a time.
+
+    Only the item being decoded plus one read chunk is held in memory, so the file
+    size does not matter as long as single items are reasonably small.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        started = False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            return bool(chunk)
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                if not fill():
+                    raise ValueError(f"Unexpected end of file in {path}")
+                continue
+
+            ch = buffer[pos]
+            if not started:
+                if ch != "[":
+                    raise ValueError(f"{path} does not contain a JSON array")
+                started = True
+                pos += 1
+                continue
+            if ch == "]":
+                return
+            if ch == ",":
+                pos += 1
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            # A scalar cut at the chunk edge can decode early ("12" of "123"); read on until a delimiter shows up
+            if not isinstance(item, (dict, list)) and not eof and (end >= len(buffer) or buffer[end] not in WHITESPACE + ",]"):
+                fill()
+                continue
+            pos = end
+            yield item
+
+
+def session_id(session: Dict, index: int) -> str:
+    # Mongo exports write _id either as {"$oid": "..."} or as a plain string
+    oid = session.get("_id")
+    if isinstance(oid, dict):
+        oid = oid.get("$oid")
+    return session.get("session_uuid") or (str(oid) if oid else None) or f"session-{index}"
+
+
+def completed_sessions(output_path: str) -> Set[str]:
+    """Session IDs already written by an earlier, interrupted batch."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "companies" in record:
+                done.add(record["session_id"])
+    return done
+
+
+# ------------------------------
+# BATCH RUNNER
+# ------------------------------
+async def run_batch(sessions_path: str, companies_path: str, output_path: str,
+                    workers: int = BATCH_WORKERS, orchestrator: Optional[ToolOrchestrator] = None) -> int:
+    """Analyzes every session with a bounded worker pool; returns the number of sessions processed.
+
+    All workers share one orchestrator, so a company that appears in many sessions is
+    scraped once. Sessions already in the output file are skipped.
+    """
+    with open(companies_path, "r", encoding="utf-8") as company_file:
+        company_data = json.load(company_file)
+
+    orchestrator = orchestrator or ToolOrchestrator()
+    # 🧭 Embed every company once up front so workers only read the shared index
+    companies = company_data[0].get("companies", []) if company_data else []
+    if len(companies) > PREFILTER_TOP_K:
+        try:
+            await get_company_index().ensure(companies)
+        except Exception as e:
+            print(f"⚠️ Pre-indexing companies failed, workers will index on demand: {e}")
+    skip = completed_sessions(output_path)
+    if skip:
+        print(f"⏭️ Skipping {len(skip)} sessions already in {output_path}")
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    processed = 0
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        def write(record: Dict) -> None:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+        async def worker() -> None:
+            nonlocal processed
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                sid, session = item
+                try:
+                    piggy_bank = await analyze_chat_and_scrape(
+                        [session], company_data, orchestrator=orchestrator, sink_path=None
+                    )
+                    write({"session_id": sid, "companies": piggy_bank.model_dump(mode="json")["companies"]})
+                except Exception as e:
+                    print(f"❌ Session {sid} failed: {e}")
+                    write({"session_id": sid, "error": str(e)})
+                processed += 1
+                print(f"📦 {processed} sessions done")
+
+        tasks = [asyncio.create_task(worker()) for _ in range(max(1, workers))]
+        sessions = iter_json_array(sessions_path)
+        index = 0
+        while True:
+            # 📖 Parsing happens off the event loop so workers keep streaming meanwhile
+            session = await asyncio.to_thread(next, sessions, None)
+            if session is None:
+                break
+            sid = session_id(session, index)
+            index += 1
+            if sid not in skip:
+                await queue.put((sid, session))
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+
+    await close_clients()
+    return processed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the supervisor over every chat session in a large export.")
+    parser.add_argument("--sessions", default="chatbot_db.chat_sessions.json")
+    parser.add_argument("--companies", default="companies.json")
+    parser.add_argument("--output", default="batch_results.jsonl")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    total = asyncio.run(run_batch(args.sessions, args.companies, args.output, args.workers))
+    print(f"✅ Wrote {total} session results to {args.output}")
+    export_trace(os.path.dirname(os.path.abspath(args.output)), name="batch_trace")
@@ -0,0 +1,199 @@
+import sys
+import os
+import asyncio
+import hashlib
+import weakref
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# ✅ Add UNGLI directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_pull_tools.llm_gateway import get_llm_gateway, OLLAMA_EMBED_MODEL
+from data_pull_tools.page_cache import get_page_cache
+
+COMPANY_INDEX_DIR = os.getenv("COMPANY_INDEX_DIR", os.path.join(".cache", "company_index"))
+PREFILTER_TOP_K = int(os.getenv("PREFILTER_TOP_K", "10"))
+HOMEPAGE_CHARS = 1000
+
+
+def company_document(company: Dict) -> str:
+    """Name, website and whatever homepage text the page cache already holds."""
+    website = company.get("website", "")
+    parts = [company["name"], website]
+    page_cache = get_page_cache()
+    # Read-only lookup: indexing many companies must not turn into one UPDATE + commit each
+    cached = page_cache.peek(website) if page_cache and website else None
+    if cached:
+        parts.append(" ".join(cached.content.get("text_content", []))[:HOMEPAGE_CHARS])
+    return "\n".join(p for p in parts if p)
+
+
+class CompanyIndex:
+    """Persisted matrix of L2-normalized company embeddings, keyed by a hash of the embedded document.
+
+    Each company (name + website) owns one row; when its document changes (new homepage
+    text in the page cache) the row is re-embedded in place instead of appending a new one.
+    Vectors, keys and owners live in a single .npz file that is written to a temp path and
+    swapped in with os.replace, so readers never see vectors and keys from different saves.
+    """
+
+    def __init__(self, path: str = COMPANY_INDEX_DIR, model: str = OLLAMA_EMBED_MODEL):
+        self.path = path
+        self.model = model
+        self._file = os.path.join(path, "index.npz")
+        self.matrix: Optional[np.ndarray] = None
+        self.rows: Dict[str, int] = {}  # document key -> row
+        self.keys: List[str] = []  # row -> document key
+        self.owners: List[str] = []  # row -> owner
+        self.owner_rows: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # Serializes embedding of missing documents per event loop so concurrent sessions embed each company once
+        self._embed_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self._file):
+            return
+        try:
+            with np.load(self._file, allow_pickle=False) as data:
+                if str(data["model"]) != self.model:
+                    return
+                matrix, keys, owners = data["vectors"], [str(k) for k in data["keys"]], [str(o) for o in data["owners"]]
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable company index {self._file}: {e}")
+            return
+        # Indexes from before owners included the website would re-embed into duplicate rows
+        if any("\n" not in owner for owner in owners):
+            print(f"⚠️ Rebuilding company index {self._file} with name + website owners")
+            return
+        if len(keys) == len(owners) == matrix.shape[0]:
+            self.matrix = matrix
+            self.keys = keys
+            self.owners = owners
+            self.rows = {key: i for i, key in enumerate(keys)}
+            self.owner_rows = {owner: i for i, owner in enumerate(owners)}
+
+    def _save(self) -> None:
+        # Snapshots are written in the order they are taken, so an older one never replaces a newer one
+        with self._save_lock:
+            with self._lock:
+                matrix = self.matrix.copy()
+                keys = list(self.keys)
+                owners = list(self.owners)
+            os.makedirs(self.path, exist_ok=True)
+            tmp_file = f"{self._file}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                np.savez(f, vectors=matrix, keys=np.array(keys), owners=np.array(owners), model=np.array(self.model))
+            os.replace(tmp_file, self._file)
+
+    def _key(self, document: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{document}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _owner(company: Dict) -> str:
+        # Companies can share a name, so the website is part of the identity
+        return f"{company['name'].strip().lower()}\n{(company.get('website') or '').strip().lower().rstrip('/')}"
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _store(self, entries: List[Tuple[str, str]], vectors: np.ndarray) -> None:
+        """Stores (owner, key) rows: overwrites each owner's stale row, appends the rest in one stack. Caller holds _lock."""
+        base = 0 if self.matrix is None else self.matrix.shape[0]
+        appended: List[np.ndarray] = []
+        for (owner, key), vector in zip(entries, vectors):
+            row = self.owner_rows.get(owner)
+            if row is None:
+                row = self.owner_rows[owner] = base + len(appended)
+                appended.append(vector)
+                self.keys.append(key)
+                self.owners.append(owner)
+            else:
+                if self.rows.get(self.keys[row]) == row:
+                    del self.rows[self.keys[row]]
+                self.keys[row] = key
+                if row >= base:
+                    appended[row - base] = vector
+                else:
+                    self.matrix[row] = vector
+            self.rows[key] = row
+        if appended:
+            new_rows = np.stack(appended)
+            self.matrix = new_rows if self.matrix is None else np.concatenate([self.matrix, new_rows])
+
+    async def ensure(self, companies: List[Dict]) -> List[int]:
+        """Embeds only companies whose document is not indexed yet; returns each company's row."""
+        documents = [company_document(c) for c in companies]
+        keys = [self._key(document) for document in documents]
+        owners = [self._owner(c) for c in companies]
+
+        loop = asyncio.get_running_loop()
+        embed_lock = self._embed_locks.get(loop)
+        if embed_lock is None:
+            embed_lock = self._embed_locks[loop] = asyncio.Lock()
+        async with embed_lock:
+            missing: Dict[str, Tuple[str, str]] = {}
+            for owner, document, key in zip(owners, documents, keys):
+                if key not in self.rows and key not in missing:
+                    missing[key] = (owner, document)
+
+            if missing:
+                vectors = await get_llm_gateway().embed([doc for _, doc in missing.values()], model=self.model)
+                new_rows = self._normalize(np.asarray(vectors, dtype=np.float32))
+                with self._lock:
+                    self._store([(owner, key) for key, (owner, _) in missing.items()], new_rows)
+                await asyncio.to_thread(self._save)
+                print(f"🧭 Indexed {len(missing)} new or changed companies")
+
+        with self._lock:
+            # A key replaced meanwhile (e.g. by another loop) still resolves to its owner's current row
+            return [self.rows[key] if key in self.rows else self.owner_rows[owner] for key, owner in zip(keys, owners)]
+
+    async def top_k(self, query: str, companies: List[Dict], k: int = PREFILTER_TOP_K) -> List[Dict]:
+        if not companies:
+            return []
+        rows = await self.ensure(companies)
+        query_vector = self._normalize(np.asarray(await get_llm_gateway().embed([query], model=self.model), dtype=np.float32))[0]
+
+        with self._lock:
+            scores = self.matrix[rows] @ query_vector
+        k = min(k, len(companies))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [companies[i] for i in best]
+
+
+# ------------------------------
+# SHARED INDEX
+# ------------------------------
+_index: Optional[CompanyIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_company_index() -> CompanyIndex:
+    """One index per process, loaded from disk once and shared by every session."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CompanyIndex()
+        return _index
+
+
+# ------------------------------
+# PREFILTER ENTRYPOINT
+# ------------------------------
+async def prefilter_companies(intent: str, companies: List[Dict], k: int = PREFILTER_TOP_K) -> List[Dict]:
+    """Keeps the K companies closest to the user's intent; falls back to all companies on failure."""
+    if len(companies) <= k or not intent.strip():
+        return companies
+    try:
+        selected = await get_company_index().top_k(intent, companies, k)
+        print(f"🎯 Prefilter kept {len(selected)} of {len(companies)} companies")
+        return selected
+    except Exception as e:
+        print(f"⚠️ Company prefilter failed, keeping all companies: {e}")
+        return companies
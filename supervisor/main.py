@@ -1,12 +1,34 @@
+import sys
+import os
 import asyncio
+import argparse
+
+# ✅ Load .env before any module reads its config from the environment
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_pull_tools.registry import load_env, close_clients
+load_env()
+
 from utils import analyze_chat_and_scrape
 from pydantic_models import PiggyBank
+from run_journal import RunJournal, journal_path
+from data_pull_tools.tracing import export_trace
 import json
 import logging
 logging.getLogger("absl").setLevel(logging.ERROR)
 
 
-async def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Match companies to a chat session and scrape them.")
+    parser.add_argument("--resume", metavar="RUN_ID", help="continue an interrupted run, skipping journaled tool calls")
+    args = parser.parse_args()
+    if args.resume and not os.path.exists(journal_path(args.resume)):
+        parser.error(f"no run to resume: {journal_path(args.resume)} does not exist")
+    return args
+
+
+async def main(resume=None):
+    journal = RunJournal(resume)
+    print(f"📒 Run ID: {journal.run_id}")
     try:
         # Load input files
         with open("chatbot_db.chat_sessions.json", "r", encoding="utf-8") as chat_file:
@@ -18,20 +40,29 @@ async def main():
         # Analyze and scrape
         piggy_bank: PiggyBank = await analyze_chat_and_scrape(
             chat_data=chat_data,
-            company_data=company_data
+            company_data=company_data,
+            journal=journal
         )
 
         # Output to terminal
         print("\n\n====== FINAL OUTPUT (PiggyBank) ======\n")
-        print(piggy_bank.model_dump_json(indent=2, ensure_ascii=False))
+        print(piggy_bank.model_dump_json(indent=2))
 
         # ✅ Save clean JSON to file
-        with open("piggy_bank.json", "w", encoding="utf-8") as out_file:
-            json.dump(piggy_bank.model_dump(), out_file, indent=2, ensure_ascii=False)
+        for path in ("piggy_bank.json", journal.output_path):
+            piggy_bank.save(path)
 
     except Exception as e:
         print(f"❌ Error occurred: {e}")
+        print(f"🔁 {len(journal)} tool results are saved; continue with: python main.py --resume {journal.run_id}")
+
+    finally:
+        journal.close()
+        await close_clients()
+        # 📈 Written only when SUPERVISOR_TRACE is set
+        export_trace(journal.directory)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    asyncio.run(main(resume=args.resume))
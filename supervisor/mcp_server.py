@@ -0,0 +1,162 @@
+# mcp_server.py
+# Long-lived MCP tool server on http://localhost:3001/sse (the address
+# client.py connects to). Tool backends, the Chrome driver pool, pooled HTTP
+# clients, the Ollama gateway and the page/LLM caches are started once and
+# stay resident, so each call pays only for its own work. Every tool has its
+# own admission gate: a few calls run, a bounded number wait, and the rest are
+# rejected with a "busy" error instead of piling up behind slow scrapes.
+#
+#   python mcp_server.py --port 3001
+
+import sys
+import os
+import time
+import asyncio
+import argparse
+import functools
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict
+
+# ✅ Add UNGLI directory to path and load .env before tool modules read their config
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_pull_tools.registry import load_env, get_tool, close_clients
+load_env()
+
+from mcp.server.fastmcp import FastMCP
+from data_pull_tools import tracing
+from orchestrator import TOOL_CONCURRENCY, TOOL_TIMEOUTS
+
+# Loopback only by default: the tools fetch any URL a caller sends, so exposing them is an explicit choice
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("MCP_PORT", "3001"))
+MCP_MAX_QUEUED = int(os.getenv("MCP_MAX_QUEUED", "16"))
+
+# MCP tool name -> orchestrator tool key, so both share the same concurrency and timeout settings;
+# tools mapped to the same key also share one gate
+SERVED_TOOLS = {
+    "scrape_company_website": "website",
+    "hn_scrape_tool": "hacker_news",
+    "hn_bulk_scrape_tool": "hacker_news",
+    "generate_product_summary": "youtube",
+}
+
+
+class ServerBusy(RuntimeError):
+    pass
+
+
+# ------------------------------
+# BACKPRESSURE
+# ------------------------------
+class ToolGate:
+    """Lets `concurrency` calls run and `max_queued` wait; anything beyond that is rejected."""
+
+    def __init__(self, name: str, concurrency: int, max_queued: int = MCP_MAX_QUEUED):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max(0, max_queued)
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+    @asynccontextmanager
+    async def admit(self):
+        if self._slots.locked() and self.waiting >= self.max_queued:
+            tracing.inc("mcp_rejected_total", tool=self.name)
+            raise ServerBusy(
+                f"{self.name} is at capacity ({self.concurrency} running, {self.waiting} queued); retry later"
+            )
+        self.waiting += 1
+        waited = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        tracing.queue_wait(f"mcp.{self.name}", waited)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+def gated(name: str, fn: Callable[..., Awaitable[Any]], gate: ToolGate, timeout: float) -> Callable[..., Awaitable[Any]]:
+    # functools.wraps keeps the signature so FastMCP derives the same input schema as the agent tool
+    @functools.wraps(fn)
+    async def call(*args, **kwargs):
+        async with gate.admit():
+            tracing.inc("mcp_calls_total", tool=name)
+            with tracing.span(f"mcp.{name}"):
+                return await asyncio.wait_for(fn(*args, **kwargs), timeout)
+    return call
+
+
+def build_server(host: str = MCP_HOST, port: int = MCP_PORT) -> FastMCP:
+    server = FastMCP("supervisor-tools", host=host, port=port)
+    gates: Dict[str, ToolGate] = {}
+    for name, key in SERVED_TOOLS.items():
+        tool = get_tool(name)
+        gate = gates.get(key)
+        if gate is None:
+            gate = gates[key] = ToolGate(key, TOOL_CONCURRENCY[key])
+        server.add_tool(gated(name, tool.function, gate, TOOL_TIMEOUTS[key]), name=name, description=tool.description)
+    return server
+
+
+# ------------------------------
+# WARM START / SHUTDOWN
+# ------------------------------
+async def warm_up(prewarm_chrome: bool) -> None:
+    """Creates the shared pools and clients on the serving loop before the first request."""
+    from data_pull_tools.driver_pool import get_driver_pool
+    from data_pull_tools.html_extract import get_parse_pool
+    from data_pull_tools.llm_cache import get_llm_cache
+    from data_pull_tools.llm_gateway import get_llm_gateway
+    from data_pull_tools.page_cache import get_page_cache
+    from data_pull_tools.page_fetcher import get_http_client
+    from data_pull_tools.youtube_scraper_tool import get_subtitle_fetcher
+
+    started = time.perf_counter()
+    with tracing.span("mcp.warm_up"):
+        get_llm_cache()
+        get_page_cache()
+        get_llm_gateway()
+        get_http_client()
+        get_subtitle_fetcher()
+        get_parse_pool()
+        if prewarm_chrome:
+            drivers = await asyncio.to_thread(get_driver_pool().prewarm)
+            print(f"🚗 {drivers} Chrome driver(s) ready")
+    print(f"🔥 Warm-up finished in {time.perf_counter() - started:.1f}s")
+
+
+async def shut_down() -> None:
+    from data_pull_tools.driver_pool import get_driver_pool
+    from data_pull_tools.html_extract import shutdown_parse_pool
+
+    await close_clients()
+    await asyncio.to_thread(get_driver_pool().close)
+    shutdown_parse_pool()
+    # 📈 Written only when SUPERVISOR_TRACE is set
+    tracing.export_trace(os.getcwd(), name="mcp_trace")
+
+
+async def serve(host: str, port: int, prewarm_chrome: bool) -> None:
+    server = build_server(host, port)
+    await warm_up(prewarm_chrome)
+    print(f"🛰️ MCP server listening on http://{host}:{port}/sse with tools: {', '.join(SERVED_TOOLS)}")
+    try:
+        await server.run_sse_async()
+    finally:
+        await shut_down()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the scraping tools over MCP (SSE) with warm pools and caches.")
+    parser.add_argument("--host", default=MCP_HOST)
+    parser.add_argument("--port", type=int, default=MCP_PORT)
+    parser.add_argument("--no-chrome-prewarm", action="store_true", help="start Chrome lazily on the first browser fetch")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(serve(args.host, args.port, prewarm_chrome=not args.no_chrome_prewarm))
@@ -0,0 +1,255 @@
+import sys
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from pydantic_models import CompanyInfo, CompanyScrapedData, HackerNewsArticle
+from run_journal import RunJournal
+
+# ✅ Add UNGLI directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_pull_tools import tracing
+
+ORCHESTRATOR_CONCURRENCY = int(os.getenv("ORCHESTRATOR_CONCURRENCY", "12"))
+TOOL_CONCURRENCY = {
+    "website": int(os.getenv("WEBSITE_TOOL_CONCURRENCY", "4")),
+    "hacker_news": int(os.getenv("HN_TOOL_CONCURRENCY", "8")),
+    "youtube": int(os.getenv("YOUTUBE_TOOL_CONCURRENCY", "2")),
+}
+TOOL_TIMEOUTS = {
+    "website": float(os.getenv("WEBSITE_TOOL_TIMEOUT", "300")),
+    "hacker_news": float(os.getenv("HN_TOOL_TIMEOUT", "30")),
+    "youtube": float(os.getenv("YOUTUBE_TOOL_TIMEOUT", "900")),
+}
+
+ToolFn = Callable[[Dict], Awaitable[Dict]]
+# companies -> {lowercased company name: fields}; one call covers a whole batch
+BulkToolFn = Callable[[List[Dict]], Awaitable[Dict[str, Dict]]]
+
+
+# ------------------------------
+# TOOL ADAPTERS (company dict -> CompanyInfo fields)
+# Backends are imported on first call so only the tools a run uses are loaded
+# ------------------------------
+async def run_website_tool(company: Dict) -> Dict:
+    from data_pull_tools.website_scraper_tool import ScraperInput, scrape_website_logic
+    output = await scrape_website_logic(ScraperInput(url=company["website"], intent=company.get("intent", "")))
+    return {"text_content": output.summary_text, "links": [str(link) for link in output.links]}
+
+
+async def run_hn_tool(company: Dict) -> Dict:
+    from data_pull_tools.hacker_news_tool import HNScrapeInput, hn_scrape_logic
+    output = await hn_scrape_logic(HNScrapeInput(company=company["name"]))
+    return {"hn_articles": [article.model_dump(mode="json") for article in output.hn_articles]}
+
+
+async def run_hn_bulk_tool(companies: List[Dict]) -> Dict[str, Dict]:
+    from data_pull_tools.hacker_news_tool import HNBulkInput, hn_bulk_search
+    output = await hn_bulk_search(HNBulkInput(companies=[c["name"] for c in companies]))
+    return {
+        name.strip().lower(): {"hn_articles": [article.model_dump(mode="json") for article in result.hn_articles]}
+        for name, result in output.items()
+    }
+
+
+async def run_youtube_tool(company: Dict) -> Dict:
+    from data_pull_tools.youtube_scraper_tool import run_video_processor
+    result = await run_video_processor(company["name"], focus="review", intent=company.get("intent", ""))
+    return {"video_summary": result.get("summary", "")}
+
+
+DEFAULT_TOOLS: Dict[str, ToolFn] = {
+    "website": run_website_tool,
+    "hacker_news": run_hn_tool,
+    "youtube": run_youtube_tool,
+}
+
+# Tools whose backend can serve many companies in one call; scrape_all batches them before fan-out
+DEFAULT_BULK_TOOLS: Dict[str, BulkToolFn] = {
+    "hacker_news": run_hn_bulk_tool,
+}
+
+
+def normalize_website(website) -> Optional[str]:
+    """Returns an absolute http(s) URL for values like "acme.com", or None when there is no usable host."""
+    if not isinstance(website, str) or not website.strip():
+        return None
+    website = website.strip()
+    if "://" not in website:
+        website = f"https://{website.lstrip('/')}"
+    parsed = urlparse(website)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname or "." not in parsed.hostname:
+        return None
+    return website
+
+
+def empty_company(company: Dict) -> CompanyScrapedData:
+    return CompanyScrapedData(
+        name=company["name"],
+        website=company["website"],
+        info=CompanyInfo(text_content="", links=[], hn_articles=[], video_summary="")
+    )
+
+
+def assemble_company(company: Dict, fields: Dict) -> CompanyScrapedData:
+    articles = []
+    for article in fields.get("hn_articles", []):
+        try:
+            articles.append(HackerNewsArticle(**article))
+        except Exception as e:
+            print(f"⚠️ Dropping malformed HN article for {company['name']}: {e}")
+    try:
+        return CompanyScrapedData(
+            name=company["name"],
+            website=company["website"],
+            info=CompanyInfo(
+                text_content=fields.get("text_content", ""),
+                links=fields.get("links", []),
+                hn_articles=articles,
+                video_summary=fields.get("video_summary", "")
+            )
+        )
+    except Exception as e:
+        print(f"⚠️ Tool output for {company['name']} did not validate, keeping an empty record: {e}")
+        return empty_company(company)
+
+
+# ------------------------------
+# ORCHESTRATOR
+# ------------------------------
+class ToolOrchestrator:
+    """Runs every data-pull tool for every company concurrently, with global and per-tool limits.
+
+    Each (company, tool) call runs at most once per orchestrator: concurrent and later
+    requests for the same pair await the first call, so one instance can be shared
+    across many chat sessions that mention the same companies.
+
+    `intent` (the user's chat text) is handed to the tools as company["intent"] so they
+    can pack their summary context with the most relevant passages. A shared
+    orchestrator should leave it empty, since its results serve several sessions.
+
+    Tools listed in `bulk_tools` (Hacker News by default) are run once for all companies
+    in a scrape_all call; each company's share of that call is memoized like a single call.
+    """
+
+    def __init__(self, tools: Optional[Dict[str, ToolFn]] = None, concurrency: int = ORCHESTRATOR_CONCURRENCY,
+                 tool_concurrency: Optional[Dict[str, int]] = None, tool_timeouts: Optional[Dict[str, float]] = None,
+                 journal: Optional[RunJournal] = None, intent: str = "",
+                 bulk_tools: Optional[Dict[str, BulkToolFn]] = None):
+        self.tools = tools or DEFAULT_TOOLS
+        # Custom tool sets opt in to batching explicitly
+        self.bulk_tools = bulk_tools if bulk_tools is not None else ({} if tools else DEFAULT_BULK_TOOLS)
+        self.journal = journal
+        self.intent = intent
+        tool_concurrency = {**TOOL_CONCURRENCY, **(tool_concurrency or {})}
+        self.tool_timeouts = {**TOOL_TIMEOUTS, **(tool_timeouts or {})}
+        self._global = asyncio.Semaphore(max(1, concurrency))
+        self._tool_slots = {name: asyncio.Semaphore(max(1, tool_concurrency.get(name, concurrency))) for name in self.tools}
+        self._calls: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def run_tool(self, name: str, company: Dict) -> Dict:
+        key = (company["name"].strip().lower(), name)
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(self._run_tool(name, company))
+        # 🛡 One cancelled waiter must not cancel the call other sessions are sharing
+        return await asyncio.shield(call)
+
+    def _prefetch_bulk(self, name: str, companies: List[Dict]) -> None:
+        """Starts one bulk call for every company not already memoized or journaled for this tool."""
+        pending = [
+            c for c in companies
+            if (c["name"].strip().lower(), name) not in self._calls
+            and not (self.journal and self.journal.done(c["name"], name))
+        ]
+        if not pending:
+            return
+        batch = asyncio.ensure_future(self._run_bulk(name, pending))
+        for company in pending:
+            key = (company["name"].strip().lower(), name)
+            self._calls[key] = asyncio.ensure_future(self._bulk_result(name, company, batch))
+
+    async def _run_bulk(self, name: str, companies: List[Dict]) -> Optional[Dict[str, Dict]]:
+        timeout = self.tool_timeouts.get(name)
+        waited = time.perf_counter()
+        async with self._tool_slots[name]:
+            async with self._global:
+                tracing.queue_wait(f"tool.{name}", waited)
+                try:
+                    with tracing.span(f"tool.{name}.bulk", companies=len(companies)):
+                        return await asyncio.wait_for(self.bulk_tools[name](companies), timeout)
+                except asyncio.TimeoutError:
+                    print(f"⏱️ bulk {name} timed out after {timeout}s for {len(companies)} companies")
+                except Exception as e:
+                    print(f"❌ bulk {name} failed for {len(companies)} companies: {e}")
+        return None
+
+    async def _bulk_result(self, name: str, company: Dict, batch: "asyncio.Future") -> Dict:
+        results = await asyncio.shield(batch)
+        if results is None:
+            # The batch failed as a whole; retry this company on its own
+            return await self._run_tool(name, company)
+        fields = results.get(company["name"].strip().lower(), {})
+        tracing.inc("tool_calls_total", tool=name, outcome="ok")
+        if self.journal:
+            self.journal.record(company["name"], name, fields)
+        return fields
+
+    async def _run_tool(self, name: str, company: Dict) -> Dict:
+        if self.journal and self.journal.done(company["name"], name):
+            tracing.inc("tool_calls_total", tool=name, outcome="journaled")
+            return self.journal.get(company["name"], name)
+
+        timeout = self.tool_timeouts.get(name)
+        waited = time.perf_counter()
+        async with self._tool_slots[name]:
+            async with self._global:
+                tracing.queue_wait(f"tool.{name}", waited)
+                try:
+                    with tracing.span(f"tool.{name}", company=company["name"]):
+                        fields = await asyncio.wait_for(self.tools[name]({**company, "intent": self.intent}), timeout)
+                    tracing.inc("tool_calls_total", tool=name, outcome="ok")
+                    # 📒 Checkpoint right away so a crash later in the run keeps this result
+                    if self.journal:
+                        self.journal.record(company["name"], name, fields)
+                    return fields
+                except asyncio.TimeoutError:
+                    print(f"⏱️ {name} timed out after {timeout}s for {company['name']}")
+                    tracing.inc("tool_calls_total", tool=name, outcome="timeout")
+                except Exception as e:
+                    print(f"❌ {name} failed for {company['name']}: {e}")
+                    tracing.inc("tool_calls_total", tool=name, outcome="error")
+        return {}
+
+    async def scrape_company(self, company: Dict) -> CompanyScrapedData:
+        """Expects a company already passed through normalize_website; never raises for tool or data errors."""
+        try:
+            with tracing.span("company", company=company["name"]):
+                results = await asyncio.gather(*(self.run_tool(name, company) for name in self.tools))
+            if self.journal:
+                fields = self.journal.fields_for(company["name"])
+            else:
+                fields = {}
+                for result in results:
+                    fields.update(result)
+            print(f"✅ Collected data for {company['name']}")
+            return assemble_company(company, fields)
+        except Exception as e:
+            print(f"❌ Collecting data failed for {company['name']}, keeping an empty record: {e}")
+            return empty_company(company)
+
+    async def scrape_all(self, companies: List[Dict]) -> List[CompanyScrapedData]:
+        prepared = []
+        for company in companies:
+            website = normalize_website(company.get("website"))
+            if not company.get("name") or website is None:
+                # No record can be built without a name and a valid URL, so skip instead of failing the run
+                print(f"⚠️ Skipping company with missing name or website: {company.get('name') or company}")
+                continue
+            prepared.append({**company, "website": website})
+        for name in self.bulk_tools:
+            if name in self.tools:
+                self._prefetch_bulk(name, prepared)
+        results = await asyncio.gather(*(self.scrape_company(c) for c in prepared), return_exceptions=True)
+        return [r for r in results if isinstance(r, CompanyScrapedData)]
@@ -1,3 +1,4 @@
+import json
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional
 
@@ -46,3 +47,8 @@ class CompanyScrapedData(BaseModel):
 
 class PiggyBank(BaseModel):
     companies: List[CompanyScrapedData]
+
+    def save(self, path: str) -> None:
+        # mode="json" turns HttpUrl values into plain strings so json.dump can write them
+        with open(path, "w", encoding="utf-8") as out_file:
+            json.dump(self.model_dump(mode="json"), out_file, indent=2, ensure_ascii=False)
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+RUNS_DIR = os.getenv("RUNS_DIR", "runs")
+
+
+def new_run_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def journal_path(run_id: str, directory: str = RUNS_DIR) -> str:
+    return os.path.join(directory, run_id, "journal.jsonl")
+
+
+# ------------------------------
+# RUN JOURNAL
+# ------------------------------
+class RunJournal:
+    """Append-only JSONL checkpoint of every completed (company, tool) result for one run.
+
+    Each record is flushed and fsynced as soon as the tool returns, so a crash loses at
+    most the calls that were in flight. Reopening the same run ID replays the journal
+    and lets the orchestrator skip everything that already finished; an unknown run ID
+    raises FileNotFoundError instead of quietly starting a new run under that ID.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, directory: str = RUNS_DIR):
+        if run_id and not os.path.exists(journal_path(run_id, directory)):
+            raise FileNotFoundError(f"No journal for run {run_id} in {directory}")
+        self.run_id = run_id or new_run_id()
+        self.directory = os.path.join(directory, self.run_id)
+        self.path = journal_path(self.run_id, directory)
+        self.sink_path = os.path.join(self.directory, "piggy_bank.stream.jsonl")
+        self.output_path = os.path.join(self.directory, "piggy_bank.json")
+        self._results: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _key(company: str, tool: str) -> Tuple[str, str]:
+        return company.strip().lower(), tool
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write leaves a truncated last line; that call is simply redone
+                    continue
+                self._results[self._key(record["company"], record["tool"])] = record["fields"]
+        self._drop_partial_line()
+        if self._results:
+            print(f"📒 Resuming run {self.run_id}: {len(self._results)} tool results already journaled")
+
+    def _drop_partial_line(self) -> None:
+        """Cuts a truncated trailing record so new appends start on a fresh line."""
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def done(self, company: str, tool: str) -> bool:
+        return self._key(company, tool) in self._results
+
+    def get(self, company: str, tool: str) -> Optional[Dict]:
+        return self._results.get(self._key(company, tool))
+
+    def record(self, company: str, tool: str, fields: Dict) -> None:
+        line = json.dumps({"company": company, "tool": tool, "fields": fields, "at": time.time()}, ensure_ascii=False)
+        with self._lock:
+            self._results[self._key(company, tool)] = fields
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def fields_for(self, company: str) -> Dict:
+        """Merges every journaled tool result for one company."""
+        name = company.strip().lower()
+        fields: Dict = {}
+        for (journaled, _), result in self._results.items():
+            if journaled == name:
+                fields.update(result)
+        return fields
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
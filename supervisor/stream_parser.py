@@ -0,0 +1,218 @@
+import re
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from pydantic import ValidationError
+from pydantic_models import CompanyScrapedData
+
+CODE_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*$", re.MULTILINE)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+NAME_FIELD = re.compile(r'"name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+# ------------------------------
+# REPAIR
+# ------------------------------
+def repair_json(text: str) -> Any:
+    """Best-effort parse of model JSON.
+
+    Drops code fences and prose before the first bracket, ignores trailing garbage,
+    removes trailing commas and closes an unterminated string and open brackets.
+    Raises ValueError when nothing usable is left.
+    """
+    text = CODE_FENCE.sub("", text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object in model output")
+    text = text[min(starts):]
+    decoder = json.JSONDecoder(strict=False)
+    try:
+        return decoder.raw_decode(text)[0]
+    except json.JSONDecodeError:
+        pass
+
+    stack: List[str] = []
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]" and stack:
+            stack.pop()
+            if not stack:
+                text = text[:i + 1]
+                break
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    text += "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+    try:
+        return decoder.raw_decode(TRAILING_COMMA.sub(r"\1", text))[0]
+    except json.JSONDecodeError as e:
+        raise ValueError(f"unrepairable JSON: {e}") from e
+
+
+# ------------------------------
+# INCREMENTAL PARSER
+# ------------------------------
+class CompanyStreamParser:
+    """Consumes streamed model text and emits each company as soon as its JSON object closes.
+
+    Objects are picked up from `{"companies": [ {...}, ... ]}` or a bare `[ {...}, ... ]`.
+    Code fences and prose around the JSON are ignored, and only the object currently
+    being read is buffered. Objects that fail validation, or are cut off when the
+    output ends (see finish), are collected in `failed` with the company name when
+    it can be read, so a retry can ask for just those companies.
+    """
+
+    def __init__(self):
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._buffer: List[str] = []
+        self._capture_depth: Optional[int] = None
+        self.failed: List[Dict] = []
+
+    def _at_item_level(self) -> bool:
+        return self._stack == ["{", "["] or self._stack == ["["]
+
+    def _fail(self, raw: str, error: str) -> None:
+        match = NAME_FIELD.search(raw)
+        name = None
+        if match:
+            try:
+                name = json.loads(f'"{match.group(1)}"')
+            except json.JSONDecodeError:
+                name = match.group(1)
+        self.failed.append({"raw": raw, "error": error, "name": name})
+
+    def _emit(self, raw: str) -> Optional[CompanyScrapedData]:
+        try:
+            try:
+                data = json.loads(raw, strict=False)
+            except json.JSONDecodeError:
+                data = repair_json(raw)
+            return CompanyScrapedData(**data)
+        except (ValueError, ValidationError, TypeError) as e:
+            print(f"⚠️ Skipping company that failed validation: {e}")
+            self._fail(raw, str(e))
+            return None
+
+    def finish(self) -> List[CompanyScrapedData]:
+        """Ends the current output: a half-written object is recorded as failed and the state is reset."""
+        if self._capture_depth is not None and self._buffer:
+            raw = "".join(self._buffer)
+            print(f"⚠️ Model output ended inside a company object ({len(raw)} chars)")
+            self._fail(raw, "truncated output")
+        self._stack, self._buffer, self._capture_depth = [], [], None
+        self._in_string = self._escape = False
+        return []
+
+    def failed_names(self, since: int = 0) -> List[str]:
+        names: List[str] = []
+        for entry in self.failed[since:]:
+            if entry.get("name") and entry["name"] not in names:
+                names.append(entry["name"])
+        return names
+
+    def feed(self, text: str) -> List[CompanyScrapedData]:
+        companies = []
+        for ch in text:
+            if self._capture_depth is not None:
+                self._buffer.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"' and self._stack:
+                self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._capture_depth is None and self._at_item_level():
+                    self._capture_depth = len(self._stack)
+                    self._buffer = [ch]
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if self._capture_depth is not None and len(self._stack) == self._capture_depth:
+                    company = self._emit("".join(self._buffer))
+                    if company is not None:
+                        companies.append(company)
+                    self._buffer = []
+                    self._capture_depth = None
+        return companies
+
+
+# ------------------------------
+# ASYNC ITERATOR API
+# ------------------------------
+async def ollama_content(stream: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    """Extracts message text from Ollama /api/chat NDJSON chunks."""
+    async for data in stream:
+        if "message" in data and "content" in data["message"]:
+            yield data["message"]["content"]
+
+
+async def stream_companies(chunks: AsyncIterator[str], sink_path: Optional[str] = None,
+                           parser: Optional[CompanyStreamParser] = None,
+                           retry: Optional[Callable[[List[str]], Awaitable[str]]] = None,
+                           retries: int = 1, sink_mode: str = "w") -> AsyncIterator[CompanyScrapedData]:
+    """Yields validated companies as they close; each one is also appended to a JSONL sink.
+
+    The sink is truncated first unless `sink_mode` is "a", which keeps an earlier attempt's lines.
+
+    When the stream ends, companies that failed validation (or were cut off) are asked for
+    again through `retry(names)`, which returns fresh model text for only those companies.
+    """
+    parser = parser or CompanyStreamParser()
+    sink = open(sink_path, sink_mode, encoding="utf-8") if sink_path else None
+    emitted = set()
+
+    def accept(company: CompanyScrapedData) -> bool:
+        key = company.name.strip().lower()
+        if key in emitted:
+            return False
+        emitted.add(key)
+        if sink:
+            sink.write(company.model_dump_json() + "\n")
+            sink.flush()
+        return True
+
+    try:
+        async for text in chunks:
+            for company in parser.feed(text):
+                if accept(company):
+                    yield company
+        parser.finish()
+
+        checked = 0
+        for _ in range(retries if retry else 0):
+            names = [n for n in parser.failed_names(since=checked) if n.strip().lower() not in emitted]
+            checked = len(parser.failed)
+            if not names:
+                break
+            print(f"🔁 Re-requesting {len(names)} companies that failed validation: {', '.join(names)}")
+            try:
+                content = await retry(names)
+            except Exception as e:
+                # The companies already yielded stay valid; only the re-requested ones are lost
+                print(f"⚠️ Re-request failed, keeping {len(emitted)} validated companies: {e}")
+                break
+            for company in parser.feed(content) + parser.finish():
+                if accept(company):
+                    yield company
+    finally:
+        if sink:
+            sink.close()
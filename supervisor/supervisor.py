@@ -1,32 +1,47 @@
 import sys
 import os
 import json
-import httpx
 from typing import Tuple
-from prompts import system_message
-from pydantic_models import PiggyBank
-from utils import analyze_chat_and_scrape
 
-# ✅ Add UNGLI directory to path
+# ✅ Add UNGLI directory to path and load .env before any module reads its config from the environment
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_pull_tools.registry import load_env
+load_env()
 
-# ✅ Manual Ollama-based response
+from prompts import system_message
+from pydantic_models import PiggyBank
+from utils import analyze_chat_and_scrape, PIGGY_BANK_SCHEMA, SCHEMA_RETRIES, request_companies
+from stream_parser import CompanyStreamParser
+from data_pull_tools.llm_gateway import get_llm_gateway
+
+# ✅ Manual Ollama-based response (schema-constrained, tolerant parse, per-company retry)
 async def run_llama_agent(prompt: str) -> PiggyBank:
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post(
-                "http://localhost:11434/api/chat",
-                json={
-                    "model": "llama3",
-                    "messages": [
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": prompt}
-                    ]
-                }
-            )
-            result = response.json()
-            output = json.loads(result["message"]["content"])
-            return PiggyBank(**output)
+        content = await get_llm_gateway().chat_text([
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ], format=PIGGY_BANK_SCHEMA)
+        parser = CompanyStreamParser()
+        companies = parser.feed(content) + parser.finish()
+
+        checked = 0
+        for _ in range(SCHEMA_RETRIES):
+            done = {c.name.strip().lower() for c in companies}
+            names = [n for n in parser.failed_names(since=checked) if n.strip().lower() not in done]
+            checked = len(parser.failed)
+            if not names:
+                break
+            print(f"🔁 Re-requesting {len(names)} companies that failed validation: {', '.join(names)}")
+            try:
+                content = await request_companies(system_message, prompt, names)
+            except Exception as e:
+                print(f"⚠️ Re-request failed, keeping {len(companies)} validated companies: {e}")
+                break
+            companies += [c for c in parser.feed(content) + parser.finish() if c.name.strip().lower() not in done]
+
+        if not companies:
+            raise ValueError("No valid company objects found in Ollama response.")
+        return PiggyBank(companies=companies)
     except Exception as e:
         raise RuntimeError(f"Ollama agent failed: {e}")
 
@@ -46,8 +61,11 @@ async def smart_scrape_companies() -> PiggyBank:
     try:
         chat_data, company_data = load_inputs()
         # 🧠 Get prompt from utils
-        from utils import generate_llama_prompt
-        prompt = generate_llama_prompt(chat_data, company_data)
+        from utils import generate_llama_prompt, build_chat_text
+        from company_index import prefilter_companies
+        chat_text = build_chat_text(chat_data[0] if chat_data else {})
+        companies = await prefilter_companies(chat_text, company_data[0].get("companies", []))
+        prompt = generate_llama_prompt(chat_data, company_data, companies=companies)
         return await run_llama_agent(prompt)
     except FileNotFoundError as fnf:
         raise RuntimeError(f"Missing file: {fnf}")
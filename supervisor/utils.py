@@ -1,30 +1,27 @@
 import sys
 import os
 import json
-import asyncio
-import httpx
-from typing import List
-from dotenv import load_dotenv
+from typing import AsyncIterator, Dict, List, Optional
 from pydantic_models import CompanyScrapedData, PiggyBank
-from access import WebsiteExtractor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from data_pull_tools.website_scraper_tool import scrape_company_website
-from data_pull_tools.hacker_news_tool import hn_scrape_tool
-from data_pull_tools.youtube_scraper_tool import generate_product_summary
-from prompts import system_message
-
-# ✅ Load environment variables
-load_dotenv()
+from data_pull_tools.llm_gateway import get_llm_gateway
+from data_pull_tools import tracing
+from orchestrator import ToolOrchestrator
+from run_journal import RunJournal
+from company_index import prefilter_companies
+from stream_parser import stream_companies, ollama_content
+from prompts import synthesis_message
+
+# Ollama's structured outputs constrain generation to this JSON schema
+PIGGY_BANK_SCHEMA = PiggyBank.model_json_schema()
+SCHEMA_RETRIES = int(os.getenv("SCHEMA_RETRIES", "1"))
 
 # ------------------------------
 # PROMPT BUILDER
 # ------------------------------
-def generate_llama_prompt(chat_data, company_data) -> str:
-    session = chat_data[0] if chat_data else {}
-    messages = session.get("messages", [])
-
+def build_chat_text(session) -> str:
     chat_text = ""
-    for msg in messages:
+    for msg in session.get("messages", []):
         role = msg.get("role", "")
         question = msg.get("question", "")
         answer = msg.get("answer", "")
@@ -32,8 +29,15 @@ def generate_llama_prompt(chat_data, company_data) -> str:
             chat_text += f"User: {answer}\n"
         elif role == "assistant" and question:
             chat_text += f"Assistant: {question}\n"
+    return chat_text
 
-    companies = company_data[0].get("companies", [])
+
+def generate_llama_prompt(chat_data, company_data, companies=None) -> str:
+    session = chat_data[0] if chat_data else {}
+    chat_text = build_chat_text(session)
+
+    if companies is None:
+        companies = company_data[0].get("companies", [])
     formatted = [f"{c['name']} - {c.get('website', '')}" for c in companies]
 
     return (
@@ -49,57 +53,117 @@ def generate_llama_prompt(chat_data, company_data) -> str:
         "Make an effort to query Hacker News by brand name and use any matches."
     )
 
+def generate_synthesis_prompt(chat_text: str, scraped: List[CompanyScrapedData]) -> str:
+    collected = [
+        {
+            "name": c.name,
+            "website": str(c.website),
+            "website_summary": c.info.text_content,
+            "hn_articles": [a.model_dump(mode="json") for a in c.info.hn_articles],
+            "youtube_summary": c.info.video_summary,
+        }
+        for c in scraped
+    ]
+    return (
+        f"User chat history:\n{chat_text}\n\n"
+        f"Collected tool data per company:\n{json.dumps(collected, indent=2, ensure_ascii=False)}\n\n"
+        "Return the companies that align with the user's needs in strict JSON format per the PiggyBank schema."
+    )
+
+
+def generate_retry_prompt(prompt: str, names: List[str]) -> str:
+    return (
+        f"{prompt}\n\n"
+        f"Your previous answer for these companies was incomplete or invalid: {', '.join(names)}.\n"
+        "Return only these companies in strict JSON format per the PiggyBank schema."
+    )
+
+
+async def request_companies(system: str, prompt: str, names: List[str]) -> str:
+    """Asks the model again for just the named companies, constrained to the PiggyBank schema."""
+    with tracing.span("schema_retry", companies=len(names)):
+        tracing.inc("schema_retries_total")
+        return await get_llm_gateway().chat_text([
+            {"role": "system", "content": system},
+            {"role": "user", "content": generate_retry_prompt(prompt, names)}
+        ], format=PIGGY_BANK_SCHEMA, use_cache=False)
+
+
+def merge_tool_data(company: CompanyScrapedData, by_name: Dict[str, CompanyScrapedData]) -> CompanyScrapedData:
+    """Overwrites links and hn_articles with what the tools actually returned."""
+    source = by_name.get(company.name.strip().lower())
+    if source is None:
+        return company
+    company.website = source.website
+    company.info.links = source.info.links
+    company.info.hn_articles = source.info.hn_articles
+    if not company.info.video_summary:
+        company.info.video_summary = source.info.video_summary
+    return company
+
 # ------------------------------
-# AGENT ANALYSIS ENTRYPOINT (Ollama direct call)
+# AGENT ANALYSIS ENTRYPOINT (tools fan-out + Ollama synthesis)
 # ------------------------------
-async def analyze_chat_and_scrape(chat_data, company_data) -> List[CompanyScrapedData]:
-    prompt = generate_llama_prompt(chat_data, company_data)
-    content_chunks = []
-
+STREAM_SINK_PATH = "piggy_bank.stream.jsonl"
+
+async def stream_analysis(chat_data, company_data, sink_path: Optional[str] = STREAM_SINK_PATH,
+                          journal: Optional[RunJournal] = None,
+                          orchestrator: Optional[ToolOrchestrator] = None) -> AsyncIterator[CompanyScrapedData]:
+    """Yields each selected company as soon as the model finishes writing it.
+
+    With a journal, tool results already checkpointed for this run are reused and the
+    stream sink lives in the run's directory instead of being overwritten. Passing a
+    shared orchestrator lets several sessions reuse each other's tool calls.
+    """
+    if journal:
+        sink_path = journal.sink_path
+    session = chat_data[0] if chat_data else {}
+    chat_text = build_chat_text(session)
+
+    # 🎯 Only the companies closest to the user's intent go on to scraping and the LLM
+    with tracing.span("prefilter"):
+        companies = await prefilter_companies(chat_text, company_data[0].get("companies", []))
+
+    # 🛠 Run website, Hacker News and YouTube tools for every company at once
+    orchestrator = orchestrator or ToolOrchestrator(journal=journal, intent=chat_text)
+    with tracing.span("scrape_all", companies=len(companies)):
+        scraped = await orchestrator.scrape_all(companies)
+    by_name = {c.name.strip().lower(): c for c in scraped}
+
+    prompt = generate_synthesis_prompt(chat_text, scraped)
+    stream = get_llm_gateway().stream_chat([
+        {"role": "system", "content": synthesis_message},
+        {"role": "user", "content": prompt}
+    ], format=PIGGY_BANK_SCHEMA)
+
+    def retry(names: List[str]):
+        # Only the failed companies' tool data goes back to the model
+        wanted = {name.strip().lower() for name in names}
+        subset = [c for c in scraped if c.name.strip().lower() in wanted] or scraped
+        return request_companies(synthesis_message, generate_synthesis_prompt(chat_text, subset), names)
+
+    print("\n=== Streaming Ollama Response ===")
+    # 💾 Each company is appended to a JSONL file as soon as its object closes
+    # A resumed run appends, so the companies synthesized by the interrupted attempt survive
+    async for company in stream_companies(ollama_content(stream), sink_path=sink_path,
+                                          retry=retry, retries=SCHEMA_RETRIES,
+                                          sink_mode="a" if journal else "w"):
+        print(f"🏢 {company.name}")
+        yield merge_tool_data(company, by_name)
+
+
+async def analyze_chat_and_scrape(chat_data, company_data, journal: Optional[RunJournal] = None,
+                                  orchestrator: Optional[ToolOrchestrator] = None,
+                                  sink_path: Optional[str] = STREAM_SINK_PATH) -> PiggyBank:
     try:
-        async with httpx.AsyncClient(timeout=None) as client:
-            async with client.stream("POST", "http://localhost:11434/api/chat", json={
-                "model": "llama3",
-                "messages": [
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ]
-            }) as response:
-
-                print("\n=== Streaming Ollama Response ===")
-                async for line in response.aiter_lines():
-                    if line.strip():
-                        try:
-                            data = json.loads(line)
-                            if "message" in data and "content" in data["message"]:
-                                content = data["message"]["content"]
-                                content_chunks.append(content)
-                                print(content, end="", flush=True)
-                        except json.JSONDecodeError:
-                            continue
-
-        # Join all content chunks
-        full_content = "".join(content_chunks).strip()
-
-        # 💾 Save final structured response to JSON file (for inspection or reuse)
-        with open("piggy_bank.json", "w", encoding="utf-8") as f:
-            f.write(full_content)
-
-        if not content_chunks:
-            raise ValueError("No valid message content found in Ollama stream.")
-
-        # 🧹 Clean codeblock markers
-        if full_content.startswith("```json") or full_content.startswith("```"):
-            full_content = full_content.strip("`").strip()
-            full_content = full_content.replace("json", "").strip()
-
-        # 🧠 Parse final result
-        parsed = json.loads(full_content)
-
-        if "companies" not in parsed:
-            raise ValueError("Parsed content missing 'companies' field.")
-
-        return PiggyBank(companies=[CompanyScrapedData(**c) for c in parsed["companies"]]).companies
+        companies = [
+            company async for company in stream_analysis(
+                chat_data, company_data, sink_path=sink_path, journal=journal, orchestrator=orchestrator
+            )
+        ]
+        if not companies:
+            raise ValueError("No valid company objects found in Ollama stream.")
+        return PiggyBank(companies=companies)
 
     except Exception as e:
         raise RuntimeError(f"Failed to process Ollama response: {e}")
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "supervisor"))
+
+for module in ("numpy", "httpx"):
+    pytest.importorskip(module)
+import company_index
+from company_index import CompanyIndex
+
+
+class FakeGateway:
+    """Deterministic embeddings: one dimension per distinct document."""
+
+    def __init__(self):
+        self.calls = []
+        self.documents = {}
+
+    async def embed(self, texts, model=None):
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            index = self.documents.setdefault(text, len(self.documents))
+            vectors.append([1.0 if i == index % 64 else 0.0 for i in range(64)])
+        return vectors
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    fake = FakeGateway()
+    monkeypatch.setattr(company_index, "get_llm_gateway", lambda: fake)
+    monkeypatch.setattr(company_index, "get_page_cache", lambda: None)
+    return fake
+
+
+def companies(n):
+    return [{"name": f"c{i}", "website": f"https://c{i}.com"} for i in range(n)]
+
+
+def test_duplicate_names_get_their_own_rows(tmp_path, gateway):
+    index = CompanyIndex(str(tmp_path))
+    batch = companies(20) + [{"name": "C3", "website": "https://other-c3.com"}]
+
+    rows = asyncio.run(index.ensure(batch))
+
+    assert len(set(rows)) == len(batch)
+    assert index.matrix.shape[0] == len(batch)
+
+
+def test_top_k_with_duplicate_names_does_not_fall_back(tmp_path, gateway):
+    index = CompanyIndex(str(tmp_path))
+    batch = companies(20) + [{"name": "c3", "website": "https://other-c3.com"}]
+
+    selected = asyncio.run(index.top_k("c3\nhttps://other-c3.com", batch, k=5))
+
+    assert len(selected) == 5
+    assert selected[0]["website"] == "https://other-c3.com"
+
+
+def test_changed_document_replaces_the_row_in_place(tmp_path, gateway, monkeypatch):
+    index = CompanyIndex(str(tmp_path))
+    batch = companies(3)
+    before = asyncio.run(index.ensure(batch))
+
+    monkeypatch.setattr(company_index, "company_document", lambda c: f"{c['name']} with new homepage text")
+    after = asyncio.run(index.ensure(batch))
+
+    assert after == before
+    assert index.matrix.shape[0] == 3
+    assert len(index.rows) == 3
+
+
+def test_known_companies_are_not_embedded_again(tmp_path, gateway):
+    asyncio.run(CompanyIndex(str(tmp_path)).ensure(companies(5)))
+    reloaded = CompanyIndex(str(tmp_path))
+
+    asyncio.run(reloaded.ensure(companies(6)))
+
+    assert [len(call) for call in gateway.calls] == [5, 1]
+    assert reloaded.matrix.shape[0] == 6
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+for module in ("pydantic", "pydantic_ai", "httpx", "yt_dlp", "youtubesearchpython"):
+    pytest.importorskip(module)
+from data_pull_tools.youtube_scraper_tool import VideoProcessor
+
+# Shape of a YouTube auto-generated track: each cue repeats the previous line, with 10ms transition cues
+ROLLING_VTT = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.750 align:start position:0%
+
+hey<00:00:00.320><c> guys</c><00:00:00.640><c> welcome</c><00:00:01.040><c> back</c>
+
+00:00:02.750 --> 00:00:02.760 align:start position:0%
+hey guys welcome back
+
+
+00:00:02.760 --> 00:00:05.430 align:start position:0%
+hey guys welcome back
+this<00:00:03.120><c> balm</c><00:00:03.360><c> is</c><00:00:03.760><c> very</c>
+
+00:00:05.430 --> 00:00:05.440 align:start position:0%
+this balm is very
+
+
+00:00:05.440 --> 00:00:08.000 align:start position:0%
+this balm is very
+very<00:00:05.900><c> good</c>
+"""
+
+UPLOADED_VTT = """WEBVTT
+
+00:00:00.000 --> 00:00:02.000
+Is it any good? No.
+
+00:00:02.000 --> 00:00:04.000
+No, it's very
+
+00:00:04.000 --> 00:00:06.000
+very good.
+"""
+
+
+def test_rolling_captions_collapse_repeated_lines():
+    assert VideoProcessor.dedupe_vtt(ROLLING_VTT) == "hey guys welcome back\nthis balm is very\nvery good"
+
+
+def test_uploaded_subtitles_keep_real_repeats():
+    assert VideoProcessor.dedupe_vtt(UPLOADED_VTT) == "Is it any good? No.\nNo, it's very\nvery good."
+
+
+def test_rolling_can_be_forced():
+    vtt = "WEBVTT\n\n00:00:00.000 --> 00:00:02.000\nso we tried it\n\n00:00:02.000 --> 00:00:04.000\nso we tried it\nand liked it\n"
+    assert VideoProcessor.dedupe_vtt(vtt) == "so we tried it\nso we tried it and liked it"
+    assert VideoProcessor.dedupe_vtt(vtt, rolling=True) == "so we tried it\nand liked it"
+
+
+def test_parse_vtt_cues_strips_tags_and_headers():
+    cues = VideoProcessor.parse_vtt_cues(ROLLING_VTT)
+    assert cues[0] == (0.0, 2.75, ["hey guys welcome back"])
+    assert cues[1][1] - cues[1][0] == pytest.approx(0.01)
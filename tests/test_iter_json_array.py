@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "supervisor"))
+
+for module in ("pydantic", "httpx", "numpy"):
+    pytest.importorskip(module)
+from batch import iter_json_array, session_id
+
+ITEMS = [123456, -7.25e3, "a string, with [brackets]", {"_id": {"$oid": "abc"}, "n": [1, 2]}, True, False, None, [], {}]
+
+
+def write(tmp_path, text):
+    path = tmp_path / "sessions.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 8, 64, 1 << 16])
+def test_items_survive_any_chunk_boundary(tmp_path, chunk_size):
+    path = write(tmp_path, json.dumps(ITEMS, indent=1))
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == ITEMS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4])
+def test_number_split_across_chunks_is_not_cut_short(tmp_path, chunk_size):
+    path = write(tmp_path, "[12345,678]")
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == [12345, 678]
+
+
+def test_empty_array(tmp_path):
+    assert list(iter_json_array(write(tmp_path, "  [ ]  "))) == []
+
+
+def test_rejects_non_array(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path, '{"a": 1}')))
+
+
+def test_rejects_truncated_file(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path, '[{"a": 1}, {"b": '), chunk_size=4))
+
+
+@pytest.mark.parametrize("session, expected", [
+    ({"session_uuid": "u-1", "_id": "x"}, "u-1"),
+    ({"_id": {"$oid": "65f0"}}, "65f0"),
+    ({"_id": "65f0"}, "65f0"),
+    ({}, "session-3"),
+])
+def test_session_id_accepts_string_and_oid_ids(session, expected):
+    assert session_id(session, 3) == expected
@@ -0,0 +1,39 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "supervisor"))
+
+pytest.importorskip("pydantic")
+from pydantic_models import CompanyInfo, CompanyScrapedData, HackerNewsArticle, PiggyBank
+
+
+def test_piggy_bank_with_urls_saves_as_json(tmp_path):
+    piggy_bank = PiggyBank(companies=[
+        CompanyScrapedData(
+            name="Acmé",
+            website="https://acme.com",
+            info=CompanyInfo(
+                text_content="Makes anvils",
+                links=["https://acme.com/about"],
+                hn_articles=[HackerNewsArticle(
+                    id="1", author="pg", url="https://news.ycombinator.com/item?id=1",
+                    created_at="2024-01-01T00:00:00Z", num_comments=3, title="Acmé launches",
+                )],
+            ),
+        )
+    ])
+    path = tmp_path / "piggy_bank.json"
+
+    piggy_bank.save(str(path))
+
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    company = saved["companies"][0]
+    assert company["website"] == "https://acme.com/"
+    assert company["info"]["links"] == ["https://acme.com/about"]
+    assert company["info"]["hn_articles"][0]["url"] == "https://news.ycombinator.com/item?id=1"
+    # ensure_ascii=False keeps non-ASCII names readable in the file
+    assert "Acmé" in path.read_text(encoding="utf-8")
+    assert PiggyBank.model_validate(saved) == piggy_bank
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "supervisor"))
+
+pytest.importorskip("pydantic")
+from stream_parser import CompanyStreamParser, repair_json, stream_companies
+
+
+def company(name):
+    return {"name": name, "website": f"https://{name.lower()}.com", "info": {"text_content": "x", "hn_articles": []}}
+
+
+def output(*names):
+    return json.dumps({"companies": [company(name) for name in names]})
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+async def agen(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def collect(chunks, **kwargs):
+    async def run():
+        return [c.name async for c in stream_companies(agen(chunks), **kwargs)]
+    return asyncio.run(run())
+
+
+# ------------------------------
+# repair_json
+# ------------------------------
+def test_repair_json_strips_prose_and_code_fences():
+    text = "Here is the result:\n```json\n" + output("Acme") + "\n```\nHope this helps!"
+    assert repair_json(text) == json.loads(output("Acme"))
+
+
+def test_repair_json_closes_truncated_output():
+    assert repair_json('{"companies": [{"name": "Acme", "tags": ["a", "b') == {
+        "companies": [{"name": "Acme", "tags": ["a", "b"]}]
+    }
+
+
+def test_repair_json_drops_trailing_commas():
+    assert repair_json('[{"name": "Acme",}, ]') == [{"name": "Acme"}]
+
+
+def test_repair_json_rejects_text_without_json():
+    with pytest.raises(ValueError):
+        repair_json("Sorry, I can't help with that.")
+
+
+# ------------------------------
+# CompanyStreamParser
+# ------------------------------
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_parser_emits_companies_for_any_chunking(size):
+    parser = CompanyStreamParser()
+    names = []
+    for chunk in chunked(output("Acme", "Globex", "Initech"), size):
+        names += [c.name for c in parser.feed(chunk)]
+    assert names == ["Acme", "Globex", "Initech"]
+    assert parser.failed == []
+
+
+def test_parser_emits_each_company_as_soon_as_it_closes():
+    parser = CompanyStreamParser()
+    text = output("Acme", "Globex")
+    first_end = text.index("}}") + 2
+    assert [c.name for c in parser.feed(text[:first_end])] == ["Acme"]
+    assert [c.name for c in parser.feed(text[first_end:])] == ["Globex"]
+
+
+def test_parser_ignores_prose_and_code_fences():
+    text = "Sure! Here you go:\n```json\n" + json.dumps([company("Acme")]) + "\n```\nLet me know {if} you need more."
+    parser = CompanyStreamParser()
+    assert [c.name for c in parser.feed(text)] == ["Acme"]
+
+
+def test_parser_keeps_braces_inside_strings():
+    item = company("Acme")
+    item["info"]["text_content"] = 'Uses "{curly}" and [square] brackets'
+    parser = CompanyStreamParser()
+    assert [c.info.text_content for c in parser.feed(json.dumps([item]))] == ['Uses "{curly}" and [square] brackets']
+
+
+def test_parser_records_truncated_company_on_finish():
+    text = output("Acme", "Globex")
+    parser = CompanyStreamParser()
+    assert [c.name for c in parser.feed(text[:-20])] == ["Acme"]
+    parser.finish()
+    assert parser.failed_names() == ["Globex"]
+    assert parser.failed[0]["error"] == "truncated output"
+
+
+def test_parser_records_invalid_company_by_name():
+    bad = {"name": "Globex", "website": "not a url", "info": {"text_content": "x", "hn_articles": []}}
+    parser = CompanyStreamParser()
+    assert [c.name for c in parser.feed(json.dumps([company("Acme"), bad]))] == ["Acme"]
+    assert parser.failed_names() == ["Globex"]
+
+
+# ------------------------------
+# stream_companies
+# ------------------------------
+def test_stream_companies_retries_only_failed_names():
+    asked = []
+
+    async def retry(names):
+        asked.append(names)
+        return output(*names)
+
+    text = output("Acme", "Globex")
+    assert collect([text[:-20]], retry=retry) == ["Acme", "Globex"]
+    assert asked == [["Globex"]]
+
+
+def test_stream_companies_keeps_validated_companies_when_retry_fails():
+    async def retry(names):
+        raise RuntimeError("ollama down")
+
+    assert collect([output("Acme", "Globex")[:-20]], retry=retry) == ["Acme"]
+
+
+def test_stream_companies_appends_to_sink_in_append_mode(tmp_path):
+    sink = tmp_path / "stream.jsonl"
+    collect([output("Acme")], sink_path=str(sink))
+    collect([output("Globex")], sink_path=str(sink), sink_mode="a")
+    assert [json.loads(line)["name"] for line in sink.read_text(encoding="utf-8").splitlines()] == ["Acme", "Globex"]